@@ -0,0 +1,265 @@
+import sys
+from datetime import datetime
+
+from flask import Blueprint, flash, redirect, render_template, request, \
+    url_for
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+
+from forms import ArtistForm
+from models import db, Artist, Show, Unavailability, Venue, artist_genres, \
+    genres_from_names, touch
+from pages import ARTISTS_KEY, artist_key, browse_by_genre, \
+    cached_version, conditional, invalidate_artist, listing_version, \
+    load_related, page_version, render_listing, search_entities, \
+    strict_loading
+from replicas import read_only
+from shows import split_shows
+
+bp = Blueprint('artists', __name__)
+
+
+@bp.route('/artists')
+@read_only
+def artists():
+    def build(rows):
+        return map(lambda x: {"id": x.id, "name": x.name}, rows)
+
+    query = db.session.query(Artist.id, Artist.name).order_by(Artist.id)
+    etag, last_modified = listing_version(Artist)
+    return conditional(etag, last_modified, lambda: render_listing(
+        'pages/artists.html', 'artists', ARTISTS_KEY, etag, query, build))
+
+
+# Make it accept Get request for better UX
+@bp.route('/artists/search', methods=['GET'])
+@read_only
+def search_artists():
+    response, search_term = search_entities(Artist, 'artists.search_artists')
+    return render_template('pages/search_artists.html', results=response, search_term=search_term)
+
+
+@bp.route('/artists/<int:artist_id>')
+@read_only
+def show_artist(artist_id):
+    def render():
+        data = cached_version(artist_key(artist_id), etag,
+                              lambda: artist_page(artist_id))
+        return render_template('pages/show_artist.html', artist=data)
+
+    etag, last_modified = page_version(Artist, artist_id)
+    return conditional(etag, last_modified, render)
+
+
+def artist_page(artist_id):
+    artist = Artist.query \
+        .options(selectinload(Artist.genres), *strict_loading()) \
+        .get_or_404(artist_id)
+
+    unavailabilities = Unavailability.query.options(*strict_loading()).filter(
+        Unavailability.artist_id == artist_id, Unavailability.end_time > datetime.today())
+
+    shows = split_shows(Show.artist_id, artist_id, artist_id=artist_id)
+    venues = load_related(Venue,
+                          (show.venue_id for show in
+                           shows['past_shows'] + shows['upcoming_shows']),
+                          Venue.name, Venue.image_link)
+
+    def show_mapper(show):
+        venue = venues[show.venue_id]
+        return {
+            "venue_id": venue.id,
+            "venue_name": venue.name,
+            "venue_image_link": venue.image_link,
+            "start_time": show.start_time
+        }
+
+    def unavailability_mapper(unavailability):
+        return {
+            "id": unavailability.id,
+            "start_time": unavailability.start_time,
+            "end_time": unavailability.end_time,
+        }
+
+    past_shows_dict = list(map(show_mapper, shows['past_shows']))
+    upcoming_shows_dict = list(map(show_mapper, shows['upcoming_shows']))
+    unavailabilities = list(map(unavailability_mapper, unavailabilities))
+
+    data = {
+        "id": artist.id,
+        "name": artist.name,
+        "genres": [genre.name for genre in artist.genres],
+        "city": artist.city,
+        "state": artist.state,
+        "phone": artist.phone,
+        "website": artist.website,
+        "facebook_link": artist.facebook_link,
+        "seeking_venue": artist.seeking_venue,
+        "seeking_description": artist.seeking_description,
+        "image_link": artist.image_link,
+        "past_shows": past_shows_dict,
+        "upcoming_shows": upcoming_shows_dict,
+        "past_shows_count": shows['past_shows_count'],
+        "upcoming_shows_count": shows['upcoming_shows_count'],
+        "past_shows_more_url": shows['past_shows_more_url'],
+        "upcoming_shows_more_url": shows['upcoming_shows_more_url'],
+        "unavailabilities": unavailabilities
+    }
+
+    return data
+
+#  Update
+#  ----------------------------------------------------------------
+
+
+@bp.route('/artists/<int:artist_id>/edit', methods=['GET'])
+def edit_artist(artist_id):
+    artist_obj = Artist.query.get_or_404(artist_id)
+
+    artist = {
+        "id": artist_obj.id,
+        "name": artist_obj.name,
+    }
+
+    # populate form with ArtistForm
+    form = ArtistForm(obj=artist_obj)
+    form.genres.data = [genre.name for genre in artist_obj.genres]
+
+    return render_template('forms/edit_artist.html', form=form, artist=artist)
+
+
+@bp.route('/artists/<int:artist_id>/edit', methods=['POST'])
+def edit_artist_submission(artist_id):
+    old_artist = Artist.query.get_or_404(artist_id)
+
+    artist_data = {
+        "id": artist_id,
+        "name": request.form['name'],
+    }
+
+    form = ArtistForm(request.form)
+    error = False
+    if not form.validate():
+        if form.csrf_token.errors:
+            flash("Your session is expired. please try again")
+
+        flash("Oops!, input data not valid. please check your input!")
+        return render_template('forms/edit_artist.html', form=form, artist=artist_data)
+
+    artist_id = None
+    artist = populate_artist_from_request(old_artist, request)
+    try:
+        # venue pages show the artist's name and image
+        touch(Venue, db.session.query(Show.venue_id)
+              .filter(Show.artist_id == artist.id))
+        db.session.commit()
+        artist_id = artist.id
+        invalidate_artist(artist_id)
+    except IntegrityError:
+        db.session.rollback()
+        print(sys.exc_info())
+        error = True
+        flash("Oops!, looks like another venue uses this facebook link!")
+    except Exception:
+        db.session.rollback()
+        print(sys.exc_info())
+        error = True
+        flash("Oops!, Something went wrong!")
+    finally:
+        db.session.close()
+    if error:
+        return render_template('forms/edit_artist.html', form=form, artist=artist_data)
+    else:
+        flash('Artist ' + request.form['name'] +
+              ' was successfully updated!')
+        return redirect(url_for('artists.show_artist', artist_id=artist_id))
+
+
+#  Create Artist
+#  ----------------------------------------------------------------
+
+
+@bp.route('/artists/create', methods=['GET'])
+def create_artist_form():
+    form = ArtistForm()
+    return render_template('forms/new_artist.html', form=form)
+
+
+@bp.route('/artists/create', methods=['POST'])
+def create_artist_submission():
+    # called upon submitting the new artist listing form
+    form = ArtistForm(request.form)
+    error = False
+    if not form.validate():
+        if form.csrf_token.errors:
+            flash("Your session is expired. please try again")
+
+        flash("Oops!, input data not valid. please check your input!")
+        return render_template('forms/new_artist.html', form=form)
+
+    artist = create_artist_from_request(request)
+    artist_id = None
+    try:
+        db.session.add(artist)
+        db.session.commit()
+        artist_id = artist.id
+        invalidate_artist(artist_id)
+    except IntegrityError:
+        db.session.rollback()
+        print(sys.exc_info())
+        error = True
+        flash("Oops!, looks like another artist uses this facebook link!")
+    except Exception:
+        db.session.rollback()
+        print(sys.exc_info())
+        error = True
+        flash("Oops!, Something went wrong!")
+    finally:
+        db.session.close()
+    if error:
+        return render_template('forms/new_artist.html', form=form)
+    else:
+        flash('Artist ' + request.form['name'] +
+              ' was successfully listed!')
+        return redirect(url_for('artists.show_artist', artist_id=artist_id))
+
+
+def create_artist_from_request(request):
+    return populate_artist_from_request(Artist(), request)
+
+
+def populate_artist_from_request(artist, request):
+    form = request.form
+    seeking_venue_str = form.get('seeking_venue', '')
+    seeking_venue = len(seeking_venue_str) > 0
+
+    artist.name = form['name']
+    artist.city = form['city']
+    artist.state = form['state']
+    artist.phone = form['phone']
+    artist.genres = genres_from_names(form.getlist('genres'))
+    artist.facebook_link = form['facebook_link']
+    artist.image_link = form['image_link']
+    artist.website = form['website']
+    artist.seeking_venue = seeking_venue
+    artist.seeking_description = form['seeking_description']
+    # genres live in another table, bump the version explicitly
+    artist.updated_at = func.now()
+
+    return artist
+
+
+#  Genres
+#  ----------------------------------------------------------------
+
+@bp.route('/artists/genres/<genre_name>')
+@read_only
+def artists_by_genre(genre_name):
+    rows, next_after = browse_by_genre(Artist, artist_genres,
+                                       artist_genres.c.artist_id, genre_name)
+    data = list(map(lambda x: {"id": x.id, "name": x.name}, rows))
+    next_url = url_for('artists.artists_by_genre', genre_name=genre_name,
+                       after=next_after) if next_after else None
+    return render_template('pages/artists_by_genre.html', artists=data,
+                           genre=genre_name, next_url=next_url)
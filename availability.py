@@ -0,0 +1,149 @@
+import heapq
+from itertools import count
+
+from sqlalchemy import and_, func, literal_column
+
+# Windows are half-open, [start_time, end_time): an artist unavailable
+# until 20:00 can play at 20:00. A slot whose start equals its end is an
+# instant and is busy when it falls inside a window.
+
+
+def period(start, end, bounds="'[)'"):
+    """tsrange over two timestamps, spelled exactly like the GiST index."""
+    return func.tsrange(start, end, literal_column(bounds))
+
+
+def overlap(dialect, model, start, end, closed=None, max_length=None):
+    """Clause matching rows of `model` whose window overlaps [start, end),
+    or [start, end] when `closed` (the default for instants).
+
+    Postgres compares ranges so the GiST index on
+    (owner, tsrange(start_time, end_time)) can answer it. Other backends
+    compare the bounds on a btree (owner, start_time or end_time) index;
+    when windows are at most `max_length` long the start_time range is
+    bounded on both sides.
+    """
+    if closed is None:
+        closed = start == end
+    if dialect == 'postgresql':
+        bounds = "'[]'" if closed else "'[)'"
+        return period(model.start_time, model.end_time) \
+            .op('&&')(period(start, end, bounds))
+    starts_in_time = model.start_time <= end if closed \
+        else model.start_time < end
+    clause = and_(starts_in_time, model.end_time > start)
+    if max_length is not None:
+        clause = and_(clause, model.start_time > start - max_length)
+    return clause
+
+
+def _starts_in_time(window_start, start, end):
+    return window_start <= end if start == end else window_start < end
+
+
+class IntervalTree:
+    """Static interval tree over (start, end) windows.
+
+    Windows are sorted by start and laid out as an implicit balanced
+    binary tree where each node knows the latest end in its subtree, so a
+    query skips every subtree that ends too early or starts too late.
+    """
+
+    def __init__(self, windows):
+        self._windows = sorted(windows)
+        self._max_end = [None] * len(self._windows)
+        self._build(0, len(self._windows) - 1)
+
+    def _build(self, lo, hi):
+        if lo > hi:
+            return None
+        mid = (lo + hi) // 2
+        max_end = self._windows[mid][1]
+        for child in (self._build(lo, mid - 1), self._build(mid + 1, hi)):
+            if child is not None and child > max_end:
+                max_end = child
+        self._max_end[mid] = max_end
+        return max_end
+
+    def __len__(self):
+        return len(self._windows)
+
+    def overlapping(self, start, end):
+        """Windows overlapping [start, end), ordered by start."""
+        found = []
+        ranges = [(0, len(self._windows) - 1)]
+        while ranges:
+            lo, hi = ranges.pop()
+            if lo > hi:
+                continue
+            mid = (lo + hi) // 2
+            if self._max_end[mid] <= start:
+                # nothing in this subtree ends after the slot starts
+                continue
+            ranges.append((lo, mid - 1))
+            window_start, window_end = self._windows[mid]
+            # windows to the right start even later, skip them all once
+            # one starts after the slot
+            if _starts_in_time(window_start, start, end):
+                if window_end > start:
+                    found.append(self._windows[mid])
+                ranges.append((mid + 1, hi))
+        return sorted(found)
+
+    def is_free(self, start, end):
+        return not self.overlapping(start, end)
+
+
+def busy_windows(session, model, owner_column, owner_id, start, end,
+                 closed=None, max_length=None):
+    """(start_time, end_time) of the windows of one owner overlapping
+    [start, end), in a single indexed query."""
+    dialect = session.get_bind().dialect.name
+    return session.query(model.start_time, model.end_time) \
+        .filter(owner_column == owner_id,
+                overlap(dialect, model, start, end, closed, max_length)) \
+        .all()
+
+
+def free_slots(session, model, owner_column, owner_id, slots):
+    """The (start, end) slots during which the owner has no window.
+
+    One query loads the windows overlapping the span of all slots, then
+    each slot is checked against an interval tree of those windows.
+    """
+    slots = list(slots)
+    if not slots:
+        return []
+    span_start = min(start for start, end in slots)
+    span_end = max(end for start, end in slots)
+    # closed, so instants at the very end of the span are covered too
+    tree = IntervalTree(busy_windows(session, model, owner_column, owner_id,
+                                     span_start, span_end, closed=True))
+    return [(start, end) for start, end in slots if tree.is_free(start, end)]
+
+
+def is_free(session, model, owner_column, owner_id, at):
+    """Whether the owner has no window containing the instant `at`."""
+    return bool(free_slots(session, model, owner_column, owner_id, [(at, at)]))
+
+
+def sweep_conflicts(windows):
+    """Yield the overlapping pairs among (owner, start, end, key) windows.
+
+    `windows` must be ordered by owner then start, it is consumed as a
+    stream. A heap holds the windows still open at the current start, so
+    the sweep is O(n log n) plus the number of conflicts.
+    """
+    open_windows = []
+    tiebreak = count()
+    current_owner = object()
+    for window in windows:
+        owner, start, end, key = window
+        if owner != current_owner:
+            current_owner = owner
+            open_windows = []
+        while open_windows and open_windows[0][0] <= start:
+            heapq.heappop(open_windows)
+        for _, _, other in open_windows:
+            yield other, window
+        heapq.heappush(open_windows, (end, next(tiebreak), window))
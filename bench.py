@@ -0,0 +1,261 @@
+import json
+import math
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.error import HTTPError
+from urllib.request import urlopen
+
+from flask import before_render_template, template_rendered
+from sqlalchemy import event
+
+from instrumentation import track_rows
+
+# What a budget can limit, all maxima per request
+BUDGET_KEYS = ('p50_ms', 'p95_ms', 'queries', 'rows')
+
+# What a new worker does before it can answer a request
+STARTUP_SCRIPT = 'from app import create_app; create_app()'
+
+
+class Measurement:
+    """Latencies, query counts and fetched rows of one benchmarked route."""
+
+    def __init__(self, name):
+        self.name = name
+        self.latencies = []
+        self.queries = 0
+        self.rows = 0
+        self.statuses = set()
+
+    @property
+    def p50_ms(self):
+        return percentile(self.latencies, 50) * 1000
+
+    @property
+    def p95_ms(self):
+        return percentile(self.latencies, 95) * 1000
+
+    def as_dict(self):
+        return {key: getattr(self, key) for key in BUDGET_KEYS}
+
+
+def percentile(values, percent):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = max(1, math.ceil(percent / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class QueryCounter:
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+
+    def add_rows(self, count):
+        self.rows += count
+
+
+@contextmanager
+def count_queries(engine):
+    """Count the statements run on `engine` and the rows fetched from them.
+
+    Pass the Engine class to count on every engine.
+    """
+    counter = QueryCounter()
+
+    def before_cursor_execute(conn, cursor, statement, parameters,
+                              context, executemany):
+        counter.queries += 1
+
+    def after_execute(conn, clauseelement, multiparams, params, result):
+        if result.returns_rows:
+            track_rows(result, counter.add_rows)
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(engine, 'after_execute', after_execute)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+        event.remove(engine, 'after_execute', after_execute)
+
+
+def measure(engine, name, send, iterations, warmup=1):
+    """Call `send(i)` (which returns a response) `iterations` times.
+
+    Warmup calls are not measured. Query and row counts keep the worst
+    request, so a budget is a per-request maximum.
+    """
+    measurement = Measurement(name)
+    for i in range(warmup):
+        send(-1 - i)
+    for i in range(iterations):
+        with count_queries(engine) as counter:
+            started = time.perf_counter()
+            response = send(i)
+            measurement.latencies.append(time.perf_counter() - started)
+        measurement.statuses.add(response.status_code)
+        measurement.queries = max(measurement.queries, counter.queries)
+        measurement.rows = max(measurement.rows, counter.rows)
+    return measurement
+
+
+def measure_startup(root_path, runs, warmup=1):
+    """Time `runs` fresh interpreters importing and building the app.
+
+    Includes the interpreter's own start, like a worker boot. The warmup
+    run compiles the bytecode so every measured run finds it.
+    """
+    measurement = Measurement('startup')
+    command = [sys.executable, '-c', STARTUP_SCRIPT]
+    for i in range(warmup + runs):
+        started = time.perf_counter()
+        subprocess.run(command, cwd=root_path, check=True)
+        if i >= warmup:
+            measurement.latencies.append(time.perf_counter() - started)
+    return measurement
+
+
+@contextmanager
+def serving(root_path, command, base_url, timeout=60):
+    """Run the server `command` from `root_path` for the duration of the
+    block, once it answers at `base_url`."""
+    process = subprocess.Popen(command, cwd=root_path)
+    try:
+        deadline = time.perf_counter() + timeout
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError("{} exited with status {}".format(
+                    ' '.join(command), process.returncode))
+            try:
+                urlopen(base_url + '/', timeout=1).close()
+                break
+            except OSError:
+                if time.perf_counter() > deadline:
+                    raise RuntimeError("{} did not answer within {}s".format(
+                        ' '.join(command), timeout))
+                time.sleep(0.2)
+        yield
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def measure_throughput(name, urls, requests, concurrency):
+    """GET `urls` in turn, `requests` times in all from `concurrency`
+    threads, and return the Measurement with the seconds it took.
+
+    Queries are not counted, they run in the server's processes.
+    """
+    def send(i):
+        started = time.perf_counter()
+        try:
+            with urlopen(urls[i % len(urls)], timeout=60) as response:
+                response.read()
+                status = response.status
+        except HTTPError as error:
+            status = error.code
+        return status, time.perf_counter() - started
+
+    measurement = Measurement(name)
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        for status, latency in executor.map(send, range(requests)):
+            measurement.statuses.add(status)
+            measurement.latencies.append(latency)
+    return measurement, time.perf_counter() - started
+
+
+def time_per_call(func, values, runs=5):
+    """Seconds `func` takes per value, the best of `runs` passes over
+    `values` so the machine's noise mostly drops out."""
+    passes = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        for value in values:
+            func(value)
+        passes.append(time.perf_counter() - started)
+    return min(passes) / len(values)
+
+
+def template_load_times(env, names, runs):
+    """Median milliseconds per template to compile it from source, and to
+    load it like a fresh worker does: from the bytecode cache if `env` has
+    one, else by compiling it too."""
+    # no in-memory template cache, every get_template goes to the loader
+    fresh_env = env.overlay(cache_size=0)
+    times = {}
+    for name in names:
+        source, filename, _ = env.loader.get_source(env, name)
+        compiles, loads = [], []
+        for _ in range(runs):
+            started = time.perf_counter()
+            env.compile(source, name, filename)
+            compiles.append(time.perf_counter() - started)
+            started = time.perf_counter()
+            fresh_env.get_template(name)
+            loads.append(time.perf_counter() - started)
+        times[name] = (percentile(compiles, 50) * 1000,
+                       percentile(loads, 50) * 1000)
+    return times
+
+
+@contextmanager
+def time_renders(app):
+    """Collect the seconds each render_template call of `app` spends in the
+    template, by template name. Extended layouts count in their page."""
+    renders = defaultdict(list)
+    started = []
+
+    def before(sender, template, context, **extra):
+        started.append(time.perf_counter())
+
+    def rendered(sender, template, context, **extra):
+        renders[template.name].append(time.perf_counter() - started.pop())
+
+    before_render_template.connect(before, app)
+    template_rendered.connect(rendered, app)
+    try:
+        yield renders
+    finally:
+        before_render_template.disconnect(before, app)
+        template_rendered.disconnect(rendered, app)
+
+
+def over_budget(measurement, budget):
+    """Messages for every limit of `budget` the measurement exceeds."""
+    failures = []
+    for key in BUDGET_KEYS:
+        limit = budget.get(key)
+        value = getattr(measurement, key)
+        if limit is not None and value > limit:
+            failures.append("{} {:g} > {:g}".format(key, value, limit))
+    return failures
+
+
+def load_budgets(path):
+    with open(path) as file:
+        return json.load(file)
+
+
+def save_budgets(path, measurements, latency_headroom=2.0):
+    """Record measurements as the new budgets.
+
+    Query and row counts are kept exact, any increase is worth a look.
+    Latencies get headroom since they vary between runs and machines.
+    """
+    budgets = {}
+    for measurement in measurements:
+        budgets[measurement.name] = {
+            "p50_ms": math.ceil(measurement.p50_ms * latency_headroom),
+            "p95_ms": math.ceil(measurement.p95_ms * latency_headroom),
+            "queries": measurement.queries,
+            "rows": measurement.rows,
+        }
+    with open(path, 'w') as file:
+        json.dump(budgets, file, indent=2, sort_keys=True)
+        file.write('\n')
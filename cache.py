@@ -0,0 +1,123 @@
+import hashlib
+import os
+import pickle
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+
+class NullCache:
+    """Caches nothing, every read goes to the database."""
+
+    def get(self, key):
+        return None
+
+    def set(self, key, value):
+        pass
+
+    def delete(self, *keys):
+        pass
+
+
+class LRUCache:
+    """In-process cache with a size bound and per-entry expiry.
+
+    Each worker process has its own copy, so writes only invalidate the
+    worker that handled them. Use it for single process deployments or
+    with a short CACHE_DEFAULT_TTL.
+    """
+
+    def __init__(self, max_entries=1024, ttl=300):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+
+class FileSystemCache:
+    """Cache shared by every worker on a host, one pickle file per key."""
+
+    def __init__(self, directory, ttl=300):
+        self.directory = directory
+        self.ttl = ttl
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key):
+        name = hashlib.sha1(key.encode()).hexdigest()
+        return os.path.join(self.directory, name)
+
+    def get(self, key):
+        try:
+            with open(self._path(key), 'rb') as file:
+                expires_at, value = pickle.load(file)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            return None
+        if expires_at < time.time():
+            return None
+        return value
+
+    def set(self, key, value):
+        # write then rename, so readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory)
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                pickle.dump((time.time() + self.ttl, value), file,
+                            pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def delete(self, *keys):
+        for key in keys:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+
+def create_cache(config):
+    cache_type = config['CACHE_TYPE']
+    if cache_type == 'lru':
+        return LRUCache(config['CACHE_MAX_ENTRIES'],
+                        config['CACHE_DEFAULT_TTL'])
+    if cache_type == 'filesystem':
+        return FileSystemCache(config['CACHE_DIR'],
+                               config['CACHE_DEFAULT_TTL'])
+    if cache_type == 'null':
+        return NullCache()
+    raise ValueError("Unknown CACHE_TYPE {!r}".format(cache_type))
+
+
+def cached(cache, key, build):
+    """Return the cached value of `key`, building and storing it on a miss."""
+    value = cache.get(key)
+    if value is None:
+        value = build()
+        cache.set(key, value)
+    return value
@@ -0,0 +1,546 @@
+"""`flask` commands. Only the CLI imports this module, see create_app()."""
+from datetime import timedelta
+
+import click
+from flask import Blueprint, current_app, url_for
+from flask_migrate import Migrate
+from sqlalchemy.engine import Engine
+
+import availability
+import bench
+import generator
+import importer
+import query_plans
+import search
+import warmup
+from cache import NullCache
+from imports import IMPORTERS, import_file
+from main import format_datetime
+from metrics import MeteredCache
+from models import db, Artist, Genre, Show, Unavailability, Venue, \
+    artist_genres, genre_ids, refresh_upcoming_show_counts, venue_genres
+from pages import ARTISTS_KEY, HOME_KEY, VENUES_KEY, cache, invalidate_venue
+from utils import start_of_today
+
+# no url rules, it only carries the commands
+bp = Blueprint('commands', __name__, cli_group=None)
+
+
+def init_app(app):
+    Migrate(app, db)
+    app.register_blueprint(bp)
+
+
+@bp.cli.command('search-index')
+def search_index_command():
+    """Create or rebuild the FTS5 search tables of a SQLite database.
+
+    Postgres gets its search indexes from the migrations.
+    """
+    if db.engine.dialect.name != 'sqlite':
+        raise click.ClickException("Only needed on SQLite, run `flask db upgrade`")
+    with db.engine.begin() as connection:
+        search.create_sqlite_index(connection, [Artist.__tablename__,
+                                                Venue.__tablename__])
+    click.echo("Search index rebuilt.")
+
+
+@bp.cli.command('roll-over-show-counts')
+@click.option('--since', type=click.DateTime(formats=['%Y-%m-%d']),
+              help="Start of the window of shows that became past, "
+                   "defaults to yesterday.")
+def roll_over_show_counts_command(since):
+    """Update the upcoming show counters of shows that are now in the past.
+
+    Meant to run daily after midnight. Only venues and artists with a show
+    in the window are recomputed, so running it twice is harmless.
+    """
+    today = start_of_today()
+    since = since or today - timedelta(days=1)
+
+    for model, show_owner_column in ((Venue, Show.venue_id),
+                                     (Artist, Show.artist_id)):
+        ids = db.session.query(show_owner_column) \
+            .filter(Show.start_time >= since, Show.start_time < today) \
+            .distinct() \
+            .subquery()
+        changed = refresh_upcoming_show_counts(model, show_owner_column, ids)
+        click.echo("{}: {} counters rolled over".format(
+            model.__tablename__, changed))
+    db.session.commit()
+
+
+@bp.cli.command('refresh-show-counts')
+def refresh_show_counts_command():
+    """Recompute every upcoming show counter, repairing any drift."""
+    for model, show_owner_column in ((Venue, Show.venue_id),
+                                     (Artist, Show.artist_id)):
+        changed = refresh_upcoming_show_counts(model, show_owner_column)
+        click.echo("{}: {} counters repaired".format(
+            model.__tablename__, changed))
+    db.session.commit()
+
+
+@bp.cli.command('generate-data')
+@click.option('--seed', default=1, show_default=True,
+              help="Seed of the random streams.")
+@click.option('--today', type=click.DateTime(formats=['%Y-%m-%d']),
+              help="Day the show schedule is centred on, defaults to today. "
+                   "Pin it to reproduce a dataset exactly.")
+@click.option('--artists', default=100000, show_default=True)
+@click.option('--venues', default=20000, show_default=True)
+@click.option('--shows', default=1000000, show_default=True)
+@click.option('--unavailabilities', default=50000, show_default=True)
+def generate_data_command(seed, today, artists, venues, shows,
+                          unavailabilities):
+    """Fill an empty database with a large, reproducible synthetic dataset.
+
+    Meant for load tests, benchmarks and `flask check-query-plans`. Rows
+    are streamed with COPY on Postgres and executemany elsewhere.
+    """
+    if artists < 1 or venues < 1:
+        raise click.ClickException("Generate at least one artist and venue")
+    for model in (Artist, Venue, Show, Unavailability):
+        if db.session.query(model.id).first() is not None:
+            raise click.ClickException(
+                "{} is not empty, generate into a fresh database"
+                .format(model.__tablename__))
+
+    dataset = generator.Dataset(
+        seed, today or start_of_today(),
+        genre_ids([name for name, weight in generator.GENRES]),
+        artists, venues, shows, unavailabilities)
+    connection = db.session.connection()
+    for table, rows in ((Artist.__table__, dataset.artists()),
+                        (Venue.__table__, dataset.venues()),
+                        (artist_genres, dataset.artist_genres()),
+                        (venue_genres, dataset.venue_genres()),
+                        (Show.__table__, dataset.shows()),
+                        (Unavailability.__table__, dataset.unavailabilities())):
+        count = generator.write_rows(connection, table, rows)
+        if 'id' in table.c:
+            generator.reset_sequence(connection, table)
+        db.session.commit()
+        connection = db.session.connection()
+        click.echo("{}: {} rows".format(table.name, count))
+
+    for model, show_owner_column in ((Venue, Show.venue_id),
+                                     (Artist, Show.artist_id)):
+        refresh_upcoming_show_counts(model, show_owner_column)
+    db.session.commit()
+    cache.delete(HOME_KEY, VENUES_KEY, ARTISTS_KEY)
+    click.echo("Upcoming show counters refreshed.")
+
+
+def sample_entities():
+    """A venue, an artist and a genre to point the sample routes at."""
+    venue = Venue.query.order_by(Venue.id).first()
+    artist = Artist.query.order_by(Artist.id).first()
+    genre = Genre.query.order_by(Genre.id).first()
+    if venue is None or artist is None or genre is None:
+        raise click.ClickException("Seed the database first")
+    return venue, artist, genre
+
+
+def sample_urls(venue, artist, genre):
+    """(name, url) of the read routes whose cost should not grow with the
+    catalogue."""
+    with current_app.test_request_context():
+        return [
+            ('index', url_for('main.index')),
+            ('shows', url_for('shows.shows')),
+            ('shows_by_venue', url_for('shows.shows', venue_id=venue.id)),
+            ('shows_by_artist', url_for('shows.shows', artist_id=artist.id,
+                                        order='desc')),
+            ('show_venue', url_for('venues.show_venue', venue_id=venue.id)),
+            ('show_artist', url_for('artists.show_artist',
+                                    artist_id=artist.id)),
+            ('search_venues', url_for('venues.search_venues',
+                                      search_term=venue.name)),
+            ('search_artists', url_for('artists.search_artists',
+                                       search_term=artist.name)),
+            ('search_shows', url_for('shows.search_shows',
+                                     search_term=artist.name)),
+            ('search_shows_facets', url_for('shows.search_shows',
+                                            city=venue.city,
+                                            genre=genre.name)),
+            ('artists_by_genre', url_for('artists.artists_by_genre',
+                                         genre_name=genre.name)),
+            ('venues_by_genre', url_for('venues.venues_by_genre',
+                                        genre_name=genre.name)),
+            ('artists_available', url_for('unavailabilities.artists_available',
+                                          at=start_of_today().isoformat(),
+                                          city=artist.city,
+                                          genre=genre.name)),
+        ]
+
+
+def get_page(client, url):
+    """GET `url` like a request of its own, reading the whole body.
+
+    The command's app context outlives the requests, and with it the
+    session: objects a request loaded would answer the next one's get()
+    from the identity map, skipping its queries and loader options.
+    """
+    db.session.remove()
+    return client.get(url, buffered=True)
+
+
+@bp.cli.command('bench')
+@click.option('--iterations', default=20, show_default=True,
+              help="Measured requests per route.")
+@click.option('--startup-runs', default=5, show_default=True,
+              help="Measured cold starts of the app, 0 skips them.")
+@click.option('--budgets', 'budgets_path',
+              help="JSON file of per-route budgets, defaults to "
+                   "BENCH_BUDGETS.")
+@click.option('--record', is_flag=True,
+              help="Save this run as the new budgets instead of checking.")
+@click.option('--with-cache', is_flag=True,
+              help="Keep the page cache, by default every request is cold.")
+def bench_command(iterations, startup_runs, budgets_path, record, with_cache):
+    """Benchmark every route and compare with the stored budgets.
+
+    Records p50/p95 latency, queries and fetched rows per request, and
+    fails when a route goes over its budget. Run it against a large
+    dataset, see `flask generate-data`. Show creation is measured too:
+    its shows are booked ten years ahead and deleted afterwards. So is
+    the time a fresh worker takes to import and build the app. Pages run
+    with STRICT_LOADING, so an N+1 query pattern fails them.
+    """
+    app = current_app._get_current_object()
+    budgets_path = budgets_path or app.config['BENCH_BUDGETS']
+    venue, artist, genre = sample_entities()
+    with app.test_request_context():
+        routes = [('venues', url_for('venues.venues')),
+                  ('artists', url_for('artists.artists'))]
+    routes += sample_urls(venue, artist, genre)
+    # requests close the session, keep plain ids
+    venue_id, artist_id = venue.id, artist.id
+
+    client = app.test_client()
+    far_future = start_of_today() + timedelta(days=3650)
+
+    def create_show(i):
+        start_time = far_future + timedelta(days=i)
+        db.session.remove()
+        return client.post('/shows/create', data={
+            'artist_id': artist_id,
+            'venue_id': venue_id,
+            'start_time': start_time.strftime('%Y-%m-%d %H:%M:%S'),
+            'duration': 60,
+        })
+
+    page_cache, csrf, strict = app.extensions['cache'], \
+        app.config.get('WTF_CSRF_ENABLED', True), app.config['STRICT_LOADING']
+    if not with_cache:
+        app.extensions['cache'] = MeteredCache(NullCache())
+    app.config['WTF_CSRF_ENABLED'] = False
+    # a lazy load sneaking into a page fails it with a 500
+    app.config['STRICT_LOADING'] = True
+    # reads may go to a replica, count the queries of every engine; whole
+    # bodies are read so streamed pages are measured to their last byte
+    try:
+        measurements = [
+            bench.measure(Engine, name,
+                          lambda i, url=url: get_page(client, url),
+                          iterations)
+            for name, url in routes
+        ]
+        measurements.append(bench.measure(Engine, 'create_show',
+                                          create_show, iterations))
+    finally:
+        app.extensions['cache'] = page_cache
+        app.config['WTF_CSRF_ENABLED'] = csrf
+        app.config['STRICT_LOADING'] = strict
+        # through the session, so the Show events undo the counters
+        # warmup requests book the days before far_future
+        for show in Show.query.filter(
+                Show.venue_id == venue_id,
+                Show.start_time >= far_future - timedelta(days=1)):
+            db.session.delete(show)
+        db.session.commit()
+        invalidate_venue(venue_id)
+
+    if startup_runs:
+        measurements.append(bench.measure_startup(app.root_path,
+                                                  startup_runs))
+
+    if record:
+        bench.save_budgets(budgets_path, measurements)
+        click.echo("Budgets saved to {}".format(budgets_path))
+        budgets = {}
+    else:
+        try:
+            budgets = bench.load_budgets(budgets_path)
+        except FileNotFoundError:
+            raise click.ClickException(
+                "No budgets at {}, record them with --record"
+                .format(budgets_path))
+
+    # a rejected show re-renders the form with a 200, only the redirect
+    # means it was booked
+    expected_statuses = {'create_show': {302}}
+    failed = False
+    for measurement in measurements:
+        expected = expected_statuses.get(measurement.name)
+        problems = ["status {}".format(status)
+                    for status in sorted(measurement.statuses)
+                    if (status not in expected if expected else status >= 400)]
+        if not record:
+            budget = budgets.get(measurement.name)
+            if budget is None:
+                problems.append("no budget")
+            else:
+                problems += bench.over_budget(measurement, budget)
+        failed = failed or bool(problems)
+        click.echo("{:<22} p50 {:8.1f} ms  p95 {:8.1f} ms  {:4} queries  "
+                   "{:7} rows  {}".format(
+                       measurement.name, measurement.p50_ms,
+                       measurement.p95_ms, measurement.queries,
+                       measurement.rows, ', '.join(problems) or 'ok'))
+
+    if failed:
+        raise click.ClickException("Some routes are over budget")
+
+
+# gunicorn arguments of each way to serve the app, the other settings
+# come from gunicorn.conf.py
+SERVERS = {
+    'sync': ['wsgi:app'],
+    'gevent': ['-k', 'gevent', '--worker-connections', '1000', 'green:app'],
+}
+
+
+@bp.cli.command('bench-concurrency')
+@click.option('--requests', 'request_count', default=2000, show_default=True,
+              help="Requests per server, spread over the sample routes.")
+@click.option('--concurrency', default=50, show_default=True,
+              help="Requests in flight at once.")
+@click.option('--workers', default=2, show_default=True,
+              help="gunicorn workers of each server.")
+@click.option('--port', default=8765, show_default=True)
+@click.option('--server', 'servers', multiple=True,
+              type=click.Choice(sorted(SERVERS)),
+              help="Servers to compare, by default all of them.")
+def bench_concurrency_command(request_count, concurrency, workers, port,
+                              servers):
+    """Compare the throughput of the sync and gevent servers.
+
+    Starts each one with gunicorn on the configured database and sends
+    concurrent GETs to the sample routes, those that wait on the database
+    are where gevent should gain. Run it against Postgres, SQLite does not
+    yield while it waits, with a large dataset, see `flask
+    generate-data`. `flask bench` measures single request latency instead.
+    """
+    app = current_app._get_current_object()
+    venue, artist, genre = sample_entities()
+    base_url = 'http://127.0.0.1:{}'.format(port)
+    urls = [base_url + url for name, url in sample_urls(venue, artist, genre)]
+
+    results = []
+    for server in servers or sorted(SERVERS, reverse=True):
+        command = ['gunicorn', '--bind', '127.0.0.1:{}'.format(port),
+                   '--workers', str(workers)] + SERVERS[server]
+        try:
+            with bench.serving(app.root_path, command, base_url):
+                results.append(bench.measure_throughput(
+                    server, urls, request_count, concurrency))
+        except RuntimeError as error:
+            raise click.ClickException(str(error))
+
+    failed = False
+    for measurement, seconds in results:
+        problems = ["status {}".format(status)
+                    for status in sorted(measurement.statuses)
+                    if status >= 400]
+        failed = failed or bool(problems)
+        click.echo("{:<8} {:8.1f} requests/s  p50 {:8.1f} ms  p95 {:8.1f} ms"
+                   "  {}".format(measurement.name,
+                                 len(measurement.latencies) / seconds,
+                                 measurement.p50_ms, measurement.p95_ms,
+                                 ', '.join(problems) or 'ok'))
+    if len(results) > 1:
+        (first, first_seconds), (last, last_seconds) = results[0], results[-1]
+        click.echo("{} / {}: {:.2f}x the throughput".format(
+            last.name, first.name, first_seconds / last_seconds))
+
+    if failed:
+        raise click.ClickException("Some requests failed")
+
+
+@bp.cli.command('check-query-plans')
+def check_query_plans_command():
+    """EXPLAIN the queries behind each route and fail on sequential scans.
+
+    Run it against a database seeded with a realistic amount of data, on a
+    handful of rows the planner rightly prefers scanning whole tables.
+    """
+    venue, artist, genre = sample_entities()
+    # /venues and /artists list every row by design and are left out
+    urls = [url for name, url in sample_urls(venue, artist, genre)]
+
+    app = current_app._get_current_object()
+    failed = False
+    client = app.test_client()
+    # plan the queries of cold pages, a cache hit would skip them, and
+    # fail pages that lazy load
+    page_cache, app.extensions['cache'] = \
+        app.extensions['cache'], MeteredCache(NullCache())
+    strict, app.config['STRICT_LOADING'] = app.config['STRICT_LOADING'], True
+    try:
+        for url in urls:
+            # reads may go to a replica, capture on every engine
+            with query_plans.capture_selects(Engine) as statements:
+                response = get_page(client, url)
+            # a failing route runs few queries or none, its plans prove nothing
+            if response.status_code >= 400:
+                failed = True
+                click.echo("{}: status {}".format(url, response.status_code))
+                continue
+            if not statements:
+                failed = True
+                click.echo("{}: no SELECT captured".format(url))
+                continue
+            scans = query_plans.sequential_scans(
+                statements, app.config['QUERY_PLAN_SEQ_SCAN_ALLOWED'])
+            for statement, table in scans:
+                failed = True
+                click.echo("{}: sequential scan on {}\n{}\n".format(
+                    url, table, statement))
+            if not scans:
+                click.echo("{}: ok ({} queries)".format(url, len(statements)))
+    finally:
+        app.extensions['cache'] = page_cache
+        app.config['STRICT_LOADING'] = strict
+
+    if failed:
+        raise click.ClickException("Some routes fail or fall back to "
+                                   "sequential scans")
+
+
+@bp.cli.command('precompile-templates')
+def precompile_templates_command():
+    """Compile every template into TEMPLATE_CACHE_DIR.
+
+    Run it at deploy time, so no worker compiles a template on a request.
+    """
+    cache_dir = current_app.config['TEMPLATE_CACHE_DIR']
+    if cache_dir is None:
+        raise click.ClickException("Set TEMPLATE_CACHE_DIR first")
+    names = warmup.compile_templates(current_app)
+    click.echo("{} templates compiled into {}".format(len(names), cache_dir))
+
+
+@bp.cli.command('profile-templates')
+@click.option('--iterations', default=20, show_default=True,
+              help="Compiles, loads and requests per template.")
+def profile_templates_command(iterations):
+    """Report what each template costs to compile, load and render.
+
+    Compile is from source. Load is what a fresh worker pays, reading the
+    bytecode from TEMPLATE_CACHE_DIR once `flask precompile-templates`
+    filled it. Render times come from requesting the sample routes and
+    the empty forms, layouts count in the pages extending them.
+    """
+    app = current_app._get_current_object()
+    venue, artist, genre = sample_entities()
+    urls = [url for name, url in sample_urls(venue, artist, genre)]
+    with app.test_request_context():
+        urls += [url_for('venues.venues'),
+                 url_for('artists.artists'),
+                 url_for('venues.create_venue_form'),
+                 url_for('venues.edit_venue', venue_id=venue.id),
+                 url_for('artists.create_artist_form'),
+                 url_for('artists.edit_artist', artist_id=artist.id),
+                 url_for('unavailabilities.create_unavailabilities',
+                         artist_id=artist.id),
+                 url_for('shows.create_shows'),
+                 url_for('imports.import_form')]
+
+    names = sorted(app.jinja_env.list_templates(extensions=['html']))
+    load_times = bench.template_load_times(app.jinja_env, names, iterations)
+    client = app.test_client()
+    with bench.time_renders(app) as renders:
+        for url in urls:
+            for _ in range(iterations):
+                get_page(client, url)
+
+    for name in names:
+        compile_ms, load_ms = load_times[name]
+        render = renders.get(name)
+        click.echo("{:<36} compile {:6.2f} ms  load {:6.2f} ms  render {}"
+                   .format(name, compile_ms, load_ms,
+                           "p50 {:6.2f} ms  p95 {:6.2f} ms".format(
+                               bench.percentile(render, 50) * 1000,
+                               bench.percentile(render, 95) * 1000)
+                           if render else "-"))
+
+
+@bp.cli.command('bench-datetime')
+@click.option('--rows', default=5000, show_default=True,
+              help="Values formatted per pass, like the rows of a page.")
+@click.option('--format', default='full', show_default=True,
+              help="Format passed to the filter.")
+def bench_datetime_command(rows, format):
+    """Time the `datetime` template filter per row.
+
+    Formats datetimes, as the views pass them, and the same values as
+    strings, which the filter has to parse first.
+    """
+    values = [start_of_today() + timedelta(minutes=97 * i)
+              for i in range(rows)]
+    for label, inputs in (('datetime', values),
+                          ('string', [str(value) for value in values])):
+        per_row = bench.time_per_call(
+            lambda value: format_datetime(value, format), inputs)
+        click.echo("{:<8} {:7.2f} us per row  {:8.1f} ms per {} rows".format(
+            label, per_row * 1e6, per_row * rows * 1000, rows))
+
+
+@bp.cli.command('import')
+@click.argument('kind', type=click.Choice(sorted(IMPORTERS)))
+@click.argument('file', type=click.File('r', encoding='utf-8'))
+@click.option('--format', type=click.Choice(importer.FORMATS),
+              help="Format of FILE, guessed from its extension by default.")
+@click.option('--batch-size', type=int,
+              help="Rows per transaction, defaults to IMPORT_BATCH_SIZE.")
+def import_command(kind, file, format, batch_size):
+    """Import artists, venues or shows from a CSV or NDJSON FILE.
+
+    Pass - as FILE to read standard input. Rows are validated like the
+    HTML forms; rejected rows are listed by line and the rest is imported.
+    """
+    format = format or importer.format_of(file.name)
+    report = import_file(kind, file, format, batch_size)
+    for line, message in sorted(report.errors):
+        click.echo("line {}: {}".format(line, message), err=True)
+    click.echo("{}: {}".format(kind, report))
+    if report.errors:
+        raise click.ClickException("Some rows were rejected")
+
+
+@bp.cli.command('show-conflicts')
+def show_conflicts_command():
+    """List the shows overlapping another show at the same venue.
+
+    Postgres rejects them with an exclusion constraint, run this before
+    that migration or on other backends. Streams the shows in venue and
+    time order through a sweep line, so it runs in O(n log n).
+    """
+    shows = db.session.query(Show.venue_id, Show.start_time, Show.end_time,
+                             Show.id) \
+        .order_by(Show.venue_id, Show.start_time) \
+        .yield_per(1000)
+
+    conflicts = 0
+    for first, second in availability.sweep_conflicts(shows):
+        conflicts += 1
+        click.echo("venue {}: show {} ({} - {}) overlaps show {} ({} - {})"
+                   .format(first.venue_id,
+                           first.id, first.start_time, first.end_time,
+                           second.id, second.start_time, second.end_time))
+
+    if conflicts:
+        raise click.ClickException("{} conflicting shows".format(conflicts))
+    click.echo("No conflicting shows.")
@@ -1,14 +1,123 @@
 import os
-SECRET_KEY = os.urandom(32)
+# Signs sessions and CSRF tokens. Set it in production: a random key
+# differs between workers and changes on every restart.
+SECRET_KEY = os.environ.get('SECRET_KEY') or os.urandom(32)
 # Grabs the folder where the script runs.
 basedir = os.path.abspath(os.path.dirname(__file__))
 
-# Enable debug mode.
-DEBUG = True
+# Enable debug mode, only with `export FLASK_ENV=development`
+DEBUG = os.environ.get('FLASK_ENV') == 'development'
+
+
+def env_int(name, default):
+    return int(os.environ.get(name, default))
+
 
 # Connect to the database
+SQLALCHEMY_DATABASE_URI = os.environ.get(
+    'DATABASE_URL', 'postgresql://postgres@localhost:5432/fyyur_db')
 
+# Read replicas, a comma separated list of URLs. Read-only routes are
+# spread over them, everything else goes to the primary.
+SQLALCHEMY_BINDS = {
+    'replica{}'.format(i): url for i, url in enumerate(
+        url for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',')
+        if url.strip())
+}
+READ_REPLICA_BINDS = sorted(SQLALCHEMY_BINDS)
+# After a write the client reads from the primary for this long, so it
+# sees its own changes despite replication lag
+READ_REPLICA_STICKY_SECONDS = env_int('READ_REPLICA_STICKY_SECONDS', 10)
 
-SQLALCHEMY_DATABASE_URI = 'postgresql://postgres@localhost:5432/fyyur_db'
+# Connection pool of every engine, the primary and each replica. Size,
+# overflow and timeout only apply to Postgres, SQLite files are not pooled.
+DATABASE_POOL_SIZE = env_int('DATABASE_POOL_SIZE', 5)
+DATABASE_MAX_OVERFLOW = env_int('DATABASE_MAX_OVERFLOW', 10)
+# Seconds to wait for a connection when the pool and overflow are in use
+DATABASE_POOL_TIMEOUT = env_int('DATABASE_POOL_TIMEOUT', 30)
+# Reconnect connections older than this many seconds, -1 never does
+DATABASE_POOL_RECYCLE = env_int('DATABASE_POOL_RECYCLE', 1800)
+# Test connections on checkout, so a restarted database or dropped idle
+# connection costs a reconnect instead of a failed request
+DATABASE_POOL_PRE_PING = os.environ.get('DATABASE_POOL_PRE_PING', '1') != '0'
+# Postgres cancels statements running longer than this, 0 turns it off
+DATABASE_STATEMENT_TIMEOUT_MS = env_int('DATABASE_STATEMENT_TIMEOUT_MS', 30000)
 
 SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Stream /venues and /artists from a server-side cursor, STREAM_BATCH_SIZE
+# rows at a time, instead of building them in the page cache. Memory stays
+# flat and the first bytes go out at once, but every request not answered
+# with a 304 reads the whole table, holding a connection while the client
+# downloads the page.
+STREAM_LISTINGS = False
+STREAM_BATCH_SIZE = 1000
+
+# Number of shows rendered per page of the /shows listing
+SHOWS_PER_PAGE = 30
+
+# Number of past and upcoming shows listed on venue and artist pages
+DETAIL_SHOWS_LIMIT = 6
+
+# Make relationships raise instead of lazy loading on page queries,
+# turn it on in tests to catch N+1 query patterns
+STRICT_LOADING = False
+
+# Number of results per page of the venue, artist and show searches
+SEARCH_RESULTS_PER_PAGE = 20
+
+# Number of artists or venues per page when browsing by genre
+GENRE_BROWSE_PER_PAGE = 50
+
+# Default length of a show, also the slot the "who is available" finder
+# checks. Shows can not be longer than MAX_SHOW_DURATION_HOURS, which
+# bounds the overlap checks on backends without range indexes.
+SHOW_DURATION_HOURS = 3
+MAX_SHOW_DURATION_HOURS = 24
+
+# Number of artists per page of the "who is available" finder
+AVAILABLE_ARTISTS_PER_PAGE = 50
+
+# Rows inserted per transaction by `flask import` and the /import upload
+IMPORT_BATCH_SIZE = 500
+
+# Per-route latency, query and row budgets checked by `flask bench`
+BENCH_BUDGETS = os.path.join(basedir, 'bench_budgets.json')
+
+# Send per-request query count, database time and rows back in a
+# Server-Timing header. They are always logged on `fyyur.requests`.
+SERVER_TIMING = True
+
+# Statements slower than this are logged with their parameters to
+# SLOW_QUERY_LOG, None turns the log off
+SLOW_QUERY_THRESHOLD_MS = 250
+SLOW_QUERY_LOG = os.path.join(basedir, 'slow_queries.log')
+# Serialized parameters longer than this are cut, executemany statements
+# only log their first row
+SLOW_QUERY_MAX_PARAMETERS_LENGTH = 2000
+# Add the EXPLAIN ANALYZE plan of slow SELECTs, which runs them twice
+SLOW_QUERY_EXPLAIN = False
+
+# Small lookup tables `flask check-query-plans` lets the planner scan
+QUERY_PLAN_SEQ_SCAN_ALLOWED = ['genres', 'alembic_version']
+
+# Timezone and locale dates are displayed in. Show times are stored
+# without a timezone, as wall clock time in DISPLAY_TIMEZONE.
+DISPLAY_TIMEZONE = os.environ.get('DISPLAY_TIMEZONE', 'UTC')
+DISPLAY_LOCALE = 'en_US_POSIX'
+
+# Compiled templates, shared by the workers of a host and filled at
+# deploy time by `flask precompile-templates`. None compiles them in
+# memory in every worker.
+TEMPLATE_CACHE_DIR = os.path.join(basedir, 'cache', 'templates')
+
+# Pages requested once when a server starts, see warmup.py, so their
+# page cache entries are built before the first visitor asks
+WARMUP_ENDPOINTS = ['main.index', 'venues.venues', 'artists.artists']
+
+# Cache of assembled page data: 'lru' (per process), 'filesystem'
+# (shared by the workers of a host) or 'null' (disabled)
+CACHE_TYPE = 'lru'
+CACHE_DEFAULT_TTL = 300
+CACHE_MAX_ENTRIES = 1024
+CACHE_DIR = os.path.join(basedir, 'cache')
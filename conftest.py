@@ -0,0 +1,31 @@
+import pytest
+
+import search
+from app import create_app
+from models import db
+
+
+@pytest.fixture
+def app(tmp_path):
+    """The app on a fresh SQLite database, inside an app context."""
+    app = create_app()
+    app.config.update(
+        TESTING=True,
+        WTF_CSRF_ENABLED=False,
+        SQLALCHEMY_DATABASE_URI='sqlite:///{}'.format(tmp_path / 'fyyur.db'),
+        SQLALCHEMY_BINDS={},
+        READ_REPLICA_BINDS=[],
+        SLOW_QUERY_THRESHOLD_MS=None,
+    )
+    with app.app_context():
+        db.create_all()
+        with db.engine.begin() as connection:
+            search.create_sqlite_index(connection, ['artists', 'venues'])
+        yield app
+        db.session.remove()
+        db.engine.dispose()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
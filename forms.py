@@ -1,9 +1,10 @@
 from datetime import datetime, timedelta
 import re
 from flask_wtf import Form
-from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField
+from flask_wtf.file import FileField, FileRequired
+from wtforms import StringField, SelectField, SelectMultipleField, DateTimeField, IntegerField
 from wtforms.fields.simple import HiddenField
-from wtforms.validators import DataRequired, AnyOf, URL, ValidationError
+from wtforms.validators import DataRequired, AnyOf, URL, ValidationError, NumberRange
 from wtforms.widgets.core import CheckboxInput, TextArea
 
 
@@ -19,6 +20,12 @@ class ShowForm(Form):
         validators=[DataRequired()],
         default=datetime.today()
     )
+    # minutes, the views cap it at config.MAX_SHOW_DURATION_HOURS
+    duration = IntegerField(
+        'duration',
+        validators=[DataRequired(), NumberRange(min=1)],
+        default=180
+    )
 
 
 class VenueForm(Form):
@@ -93,7 +100,6 @@ class VenueForm(Form):
 
     def validate_phone(form, field):
         value = field.data
-        print(value)
 
         if not re.search("^[0-9-]*$", value):
             msg = u"Invalid phone number."
@@ -212,7 +218,6 @@ class ArtistForm(Form):
 
     def validate_phone(form, field):
         value = field.data
-        print(value)
 
         if not re.search("^[0-9-]*$", value):
             msg = u"Invalid phone number."
@@ -288,4 +293,26 @@ class UnavailabilityForm(Form):
     def validate_start_time(form, field):
         if field.data < datetime.today():
             msg = u"Start time must be in the future"
-            raise ValidationError(msg)
\ No newline at end of file
+            raise ValidationError(msg)
+
+
+class ImportForm(Form):
+    kind = SelectField(
+        'kind', validators=[DataRequired()],
+        choices=[
+            ('artists', 'Artists'),
+            ('venues', 'Venues'),
+            ('shows', 'Shows'),
+        ]
+    )
+    format = SelectField(
+        'format', default='',
+        choices=[
+            ('', 'From the file name'),
+            ('csv', 'CSV'),
+            ('ndjson', 'NDJSON'),
+        ]
+    )
+    file = FileField(
+        'file', validators=[FileRequired()]
+    )
@@ -0,0 +1,232 @@
+import csv
+import io
+import random
+from datetime import timedelta
+
+from sqlalchemy import text
+
+from importer import batched
+
+# (city, state, weight), weights roughly follow metro area populations
+CITIES = [
+    ('New York', 'NY', 190), ('Los Angeles', 'CA', 130), ('Chicago', 'IL', 95),
+    ('Dallas', 'TX', 75), ('Houston', 'TX', 70), ('Washington', 'DC', 62),
+    ('Miami', 'FL', 61), ('Philadelphia', 'PA', 61), ('Atlanta', 'GA', 60),
+    ('Phoenix', 'AZ', 49), ('Boston', 'MA', 49), ('San Francisco', 'CA', 47),
+    ('Detroit', 'MI', 43), ('Seattle', 'WA', 40), ('Minneapolis', 'MN', 37),
+    ('San Diego', 'CA', 33), ('Tampa', 'FL', 32), ('Denver', 'CO', 30),
+    ('Baltimore', 'MD', 28), ('St. Louis', 'MO', 28), ('Orlando', 'FL', 27),
+    ('Charlotte', 'NC', 27), ('San Antonio', 'TX', 26), ('Portland', 'OR', 25),
+    ('Sacramento', 'CA', 24), ('Pittsburgh', 'PA', 23), ('Austin', 'TX', 23),
+    ('Las Vegas', 'NV', 23), ('Cincinnati', 'OH', 22), ('Kansas City', 'MO', 22),
+    ('Columbus', 'OH', 21), ('Cleveland', 'OH', 20), ('Nashville', 'TN', 20),
+    ('New Orleans', 'LA', 13), ('Salt Lake City', 'UT', 12),
+]
+
+# genre names match the form choices, weights favour the popular ones
+GENRES = [
+    ('Rock n Roll', 20), ('Pop', 18), ('Hip-Hop', 16), ('R&B', 10),
+    ('Electronic', 10), ('Country', 9), ('Jazz', 7), ('Alternative', 7),
+    ('Punk', 5), ('Heavy Metal', 5), ('Soul', 5), ('Folk', 4), ('Blues', 4),
+    ('Funk', 3), ('Reggae', 3), ('Classical', 3), ('Instrumental', 2),
+    ('Musical Theatre', 2), ('Other', 2),
+]
+
+ADJECTIVES = [
+    'Velvet', 'Electric', 'Silent', 'Golden', 'Midnight', 'Broken', 'Wild',
+    'Crimson', 'Neon', 'Hollow', 'Lucky', 'Paper', 'Rusty', 'Blue', 'Savage',
+    'Gentle', 'Lonely', 'Northern', 'Burning', 'Crystal',
+]
+NOUNS = [
+    'Owls', 'Rivers', 'Machines', 'Tigers', 'Ghosts', 'Hearts', 'Wolves',
+    'Pilots', 'Saints', 'Lanterns', 'Comets', 'Shadows', 'Kings', 'Echoes',
+    'Horses', 'Sparrows', 'Engines', 'Moons', 'Strangers', 'Anchors',
+]
+VENUE_KINDS = ['Hall', 'Room', 'Theatre', 'Club', 'Lounge', 'Ballroom',
+               'Tavern', 'Arena']
+
+# shows are spread over this many days either side of `today`
+SCHEDULE_DAYS = 365
+
+
+class Dataset:
+    """A reproducible synthetic catalogue.
+
+    Every table draws from its own random stream seeded from `seed`, so
+    the same seed, counts and `today` always give the same rows, and
+    changing one count leaves the other tables untouched. Rows carry
+    explicit ids so shows can reference artists and venues without
+    reading them back.
+    """
+
+    def __init__(self, seed, today, genre_ids, artists, venues, shows,
+                 unavailabilities):
+        self.seed = seed
+        self.today = today
+        self.genre_ids = genre_ids
+        self.artist_count = artists
+        self.venue_count = venues
+        self.show_count = shows
+        self.unavailability_count = unavailabilities
+
+    def _random(self, name):
+        return random.Random('{}:{}'.format(self.seed, name))
+
+    def _cities(self, rng, count):
+        names = [(city, state) for city, state, weight in CITIES]
+        weights = [weight for city, state, weight in CITIES]
+        return rng.choices(names, weights, k=count)
+
+    def _genres(self, rng):
+        names = [name for name, weight in GENRES]
+        weights = [weight for name, weight in GENRES]
+        picked = rng.choices(names, weights, k=rng.choice((1, 1, 2, 2, 3)))
+        return sorted({self.genre_ids[name] for name in picked})
+
+    def _listing(self, rng, id, kind, city, state):
+        return {
+            "id": id,
+            "city": city,
+            "state": state,
+            "phone": '{}-{:03}-{:04}'.format(rng.randrange(200, 999),
+                                             rng.randrange(1000),
+                                             rng.randrange(10000)),
+            "facebook_link": 'https://www.facebook.com/fyyur-{}-{}'
+                             .format(kind, id),
+            "image_link": 'https://picsum.photos/seed/{}-{}/300/300'
+                          .format(kind, id),
+            "website": 'https://{}-{}.example.com'.format(kind, id),
+            "seeking_description": None,
+            "upcoming_show_count": 0,
+            "created_at": self.today - timedelta(
+                minutes=rng.randrange(3 * 365 * 24 * 60)),
+        }
+
+    def artists(self):
+        rng = self._random('artists')
+        cities = self._cities(rng, self.artist_count)
+        for id, (city, state) in enumerate(cities, 1):
+            row = self._listing(rng, id, 'artist', city, state)
+            row["name"] = 'The {} {}'.format(rng.choice(ADJECTIVES),
+                                             rng.choice(NOUNS))
+            row["seeking_venue"] = rng.random() < 0.4
+            if row["seeking_venue"]:
+                row["seeking_description"] = "Looking for venues in {}." \
+                    .format(city)
+            yield row
+
+    def venues(self):
+        rng = self._random('venues')
+        cities = self._cities(rng, self.venue_count)
+        for id, (city, state) in enumerate(cities, 1):
+            row = self._listing(rng, id, 'venue', city, state)
+            row["name"] = 'The {} {}'.format(rng.choice(ADJECTIVES),
+                                             rng.choice(VENUE_KINDS))
+            row["address"] = '{} {} Street'.format(rng.randrange(1, 2000),
+                                                   rng.choice(NOUNS)[:-1])
+            row["seeking_talent"] = rng.random() < 0.3
+            yield row
+
+    def artist_genres(self):
+        rng = self._random('artist_genres')
+        for artist_id in range(1, self.artist_count + 1):
+            for genre_id in self._genres(rng):
+                yield {"genre_id": genre_id, "artist_id": artist_id}
+
+    def venue_genres(self):
+        rng = self._random('venue_genres')
+        for venue_id in range(1, self.venue_count + 1):
+            for genre_id in self._genres(rng):
+                yield {"genre_id": genre_id, "venue_id": venue_id}
+
+    def _shows_per_venue(self):
+        # Zipf-like: a few venues host most of the shows
+        weights = [1 / (rank ** 0.8)
+                   for rank in range(1, self.venue_count + 1)]
+        total = sum(weights)
+        counts = [int(self.show_count * weight / total) for weight in weights]
+        for venue in range(self.show_count - sum(counts)):
+            counts[venue % self.venue_count] += 1
+        return counts
+
+    def shows(self):
+        """Shows never overlap at a venue, one per evening when the venue
+        has room, otherwise back to back slots through the day."""
+        rng = self._random('shows')
+        first_day = self.today - timedelta(days=SCHEDULE_DAYS)
+        span_days = 2 * SCHEDULE_DAYS
+        id = 0
+        for venue_id, count in enumerate(self._shows_per_venue(), 1):
+            if not count:
+                continue
+            slots = -(-count // span_days)
+            step = 24 * 60 // slots
+            for slot in sorted(rng.sample(range(span_days * slots), count)):
+                day, slot_of_day = divmod(slot, slots)
+                offset = 20 * 60 if slots == 1 else slot_of_day * step
+                start_time = first_day + timedelta(days=day, minutes=offset)
+                duration = min(rng.choice((90, 120, 150, 180)), step)
+                id += 1
+                yield {
+                    "id": id,
+                    "venue_id": venue_id,
+                    # popular artists play more often
+                    "artist_id": int(self.artist_count * rng.random() ** 2) + 1,
+                    "start_time": start_time,
+                    "end_time": start_time + timedelta(minutes=duration),
+                }
+
+    def unavailabilities(self):
+        rng = self._random('unavailabilities')
+        first_day = self.today - timedelta(days=SCHEDULE_DAYS)
+        for id in range(1, self.unavailability_count + 1):
+            start_time = first_day + timedelta(
+                days=rng.randrange(2 * SCHEDULE_DAYS))
+            yield {
+                "id": id,
+                "artist_id": rng.randrange(1, self.artist_count + 1),
+                "start_time": start_time,
+                "end_time": start_time + timedelta(days=rng.randrange(1, 15)),
+            }
+
+
+def _copy(connection, table, rows):
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        # an empty unquoted field is NULL for COPY
+        writer.writerow(['' if row[name] is None else row[name]
+                         for name in columns])
+    buffer.seek(0)
+    cursor = connection.connection.cursor()
+    try:
+        cursor.copy_expert('COPY {} ({}) FROM STDIN WITH (FORMAT csv)'
+                           .format(table.name, ', '.join(columns)), buffer)
+    finally:
+        cursor.close()
+
+
+def write_rows(connection, table, rows, chunk_size=10000):
+    """Stream dict rows into `table` in chunks, returns the row count.
+
+    Postgres gets COPY, other backends one executemany per chunk.
+    """
+    copy = connection.dialect.name == 'postgresql'
+    count = 0
+    for chunk in batched(rows, chunk_size):
+        if copy:
+            _copy(connection, table, chunk)
+        else:
+            connection.execute(table.insert(), chunk)
+        count += len(chunk)
+    return count
+
+
+def reset_sequence(connection, table):
+    """Move a Postgres id sequence past rows inserted with explicit ids."""
+    if connection.dialect.name != 'postgresql':
+        return
+    connection.execute(text(
+        "SELECT setval(pg_get_serial_sequence('{0}', 'id'), "
+        "coalesce(max(id), 0) + 1, false) FROM {0}".format(table.name)))
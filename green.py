@@ -0,0 +1,20 @@
+"""Cooperative entry point, serves the app from greenlets:
+
+    gunicorn -k gevent --worker-connections 1000 green:app
+
+A request waiting on Postgres yields to the other requests of its worker
+instead of holding a thread, so concurrency is bounded by the connection
+pool rather than the number of workers. The other settings, preloading
+and warmup among them, come from gunicorn.conf.py as for wsgi.py.
+"""
+from gevent import monkey
+monkey.patch_all()
+
+# psycopg2 is a C extension that blocks the whole process while it waits
+# on the server, the wait callback makes it yield to the gevent hub
+from psycogreen.gevent import patch_psycopg
+patch_psycopg()
+
+import wsgi
+
+app = wsgi.app
@@ -0,0 +1,40 @@
+"""gunicorn settings, picked up from the working directory:
+
+    gunicorn wsgi:app
+
+Concurrency model: rendering a page is Python work that holds the GIL,
+so CPU bound work only scales with processes, one worker per core.
+The rest of a request waits on the database, which threads cover:
+each worker runs WEB_THREADS requests at a time, enough to keep its core
+busy while the others wait. Raise it when the Server-Timing header shows
+requests spending most of their time in the database, and keep
+DATABASE_POOL_SIZE at least as large so threads do not queue for
+connections. Postgres must accept
+workers * (DATABASE_POOL_SIZE + DATABASE_MAX_OVERFLOW) connections per
+host, and as many again per replica.
+"""
+import multiprocessing
+import os
+
+bind = '0.0.0.0:{}'.format(os.environ.get('PORT', 8000))
+
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+worker_class = 'gthread'
+threads = int(os.environ.get('WEB_THREADS', 4))
+
+# Build and warm up the app in the master before forking, the workers
+# share its imported code, compiled templates and primed page cache
+preload_app = True
+
+
+def post_fork(server, worker):
+    # wsgi was imported by the master, this is the app it warmed up and
+    # whose pools it emptied before forking
+    import warmup
+    from wsgi import app
+    warmup.open_connections(app, server.cfg.threads)
+
+
+def child_exit(server, worker):
+    import metrics
+    metrics.mark_process_dead(worker.pid)
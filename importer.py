@@ -0,0 +1,139 @@
+import csv
+import json
+from itertools import islice
+
+from werkzeug.datastructures import MultiDict
+
+FORMATS = ('csv', 'ndjson')
+
+# Columns holding several values. CSV files separate them with commas,
+# NDJSON files use lists.
+LIST_FIELDS = ('genres',)
+
+# Checkbox columns, and the CSV spellings that tick them. Anything else,
+# 'false' and '0' included, leaves them unticked.
+BOOLEAN_FIELDS = ('seeking_venue', 'seeking_talent')
+TRUE_STRINGS = ('true', '1', 'yes', 'y')
+
+
+class Row:
+    """One record of an import file and what became of it."""
+
+    def __init__(self, line, record=None, errors=None):
+        self.line = line
+        self.record = record
+        self.errors = errors or []
+        self.data = None
+
+    @property
+    def valid(self):
+        return not self.errors
+
+
+class ImportReport:
+    """Counts the created rows and collects the rejected ones by line."""
+
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def reject(self, row, message):
+        row.errors.append(message)
+        self.errors.append((row.line, message))
+
+    @property
+    def rejected(self):
+        return len({line for line, message in self.errors})
+
+    def __str__(self):
+        return "{} created, {} rejected".format(self.created, self.rejected)
+
+
+def format_of(filename, default='csv'):
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension in ('ndjson', 'jsonl'):
+        return 'ndjson'
+    if extension == 'csv':
+        return 'csv'
+    return default
+
+
+def read_rows(lines, format):
+    """Yield a Row per record of a CSV or NDJSON text stream.
+
+    The stream is read lazily, so files of any size run in constant
+    memory. Unparsable records come out as rows carrying an error.
+    """
+    if format == 'csv':
+        reader = csv.DictReader(lines)
+        for record in reader:
+            yield Row(reader.line_num, record)
+    elif format == 'ndjson':
+        for line_number, line in enumerate(lines, 1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as error:
+                yield Row(line_number, errors=["invalid JSON: {}".format(error)])
+                continue
+            if not isinstance(record, dict):
+                yield Row(line_number, errors=["expected a JSON object"])
+                continue
+            yield Row(line_number, record)
+    else:
+        raise ValueError("Unknown import format {!r}".format(format))
+
+
+def to_formdata(record):
+    """MultiDict the WTForms classes accept, from a CSV or JSON record."""
+    formdata = MultiDict()
+    for name, value in record.items():
+        if value is None:
+            continue
+        if name in LIST_FIELDS:
+            if isinstance(value, str):
+                value = [item.strip() for item in value.split(',')
+                         if item.strip()]
+            formdata.setlist(name, [str(item) for item in value])
+        elif name in BOOLEAN_FIELDS or isinstance(value, bool):
+            if isinstance(value, str):
+                value = value.strip().lower() in TRUE_STRINGS
+            # checkbox fields send 'y' when ticked and nothing otherwise
+            if value:
+                formdata[name] = 'y'
+        else:
+            formdata[name] = str(value)
+    return formdata
+
+
+def validate_rows(rows, form_class, report):
+    """Run each row through `form_class`, the rules of the HTML forms.
+
+    Valid rows get the form's parsed data, invalid ones are rejected on
+    the report. Every row is passed on so batches keep file order.
+    """
+    for row in rows:
+        if row.valid:
+            form = form_class(formdata=to_formdata(row.record),
+                              meta={'csrf': False})
+            if form.validate():
+                row.data = form.data
+            else:
+                for name, messages in sorted(form.errors.items()):
+                    for message in messages:
+                        report.reject(row, "{}: {}".format(name, message))
+        else:
+            for message in row.errors:
+                report.errors.append((row.line, message))
+        yield row
+
+
+def batched(rows, size):
+    """Split an iterable into lists of at most `size` items."""
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
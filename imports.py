@@ -0,0 +1,273 @@
+import io
+from collections import defaultdict
+from datetime import timedelta
+
+from flask import Blueprint, current_app, flash, render_template
+
+import availability
+import importer
+from forms import ArtistForm, ImportForm, ShowForm, VenueForm
+from models import db, Artist, Show, Unavailability, Venue, artist_genres, \
+    genre_ids, refresh_upcoming_show_counts, touch, venue_genres
+from pages import ARTISTS_KEY, HOME_KEY, VENUES_KEY, artist_key, cache, \
+    venue_key
+from shows import max_show_length
+
+bp = Blueprint('imports', __name__)
+
+
+def artist_values(data):
+    return {
+        "name": data['name'],
+        "city": data['city'],
+        "state": data['state'],
+        "phone": data['phone'],
+        "facebook_link": data['facebook_link'],
+        "image_link": data['image_link'],
+        "website": data['website'],
+        "seeking_venue": len(data['seeking_venue'] or '') > 0,
+        "seeking_description": data['seeking_description'],
+    }
+
+
+def venue_values(data):
+    return {
+        "name": data['name'],
+        "city": data['city'],
+        "state": data['state'],
+        "address": data['address'],
+        "phone": data['phone'],
+        "facebook_link": data['facebook_link'],
+        "image_link": data['image_link'],
+        "website": data['website'],
+        "seeking_talent": len(data['seeking_talent'] or '') > 0,
+        "seeking_description": data['seeking_description'],
+    }
+
+
+def import_listings(model, association, owner_key, values, batch, report):
+    """Insert a batch of validated artist or venue rows.
+
+    facebook_link is unique, rows reusing a link that is already listed or
+    that comes earlier in the file are rejected after one lookup. Rows and
+    genre links go in with one executemany each.
+    """
+    rows = [row for row in batch if row.valid]
+    links = {row.data['facebook_link'] for row in rows}
+    taken = {link for link, in db.session.query(model.facebook_link)
+             .filter(model.facebook_link.in_(links))} if links else set()
+
+    accepted = []
+    for row in rows:
+        link = row.data['facebook_link']
+        if link in taken:
+            report.reject(row, "facebook_link: {} is already listed"
+                          .format(link))
+        else:
+            taken.add(link)
+            accepted.append(row)
+    if not accepted:
+        return 0, []
+
+    db.session.execute(model.__table__.insert(),
+                       [values(row.data) for row in accepted])
+    ids = dict(db.session.query(model.facebook_link, model.id)
+               .filter(model.facebook_link.in_(
+                   [row.data['facebook_link'] for row in accepted])))
+    genres = genre_ids(name for row in accepted for name in row.data['genres'])
+    db.session.execute(association.insert(), [
+        {"genre_id": genres[name], owner_key: ids[row.data['facebook_link']]}
+        for row in accepted for name in set(row.data['genres'])
+    ])
+    return len(accepted), []
+
+
+def import_artists(batch, report):
+    created, stale = import_listings(Artist, artist_genres, 'artist_id',
+                                     artist_values, batch, report)
+    return created, stale + [HOME_KEY, ARTISTS_KEY]
+
+
+def import_venues(batch, report):
+    created, stale = import_listings(Venue, venue_genres, 'venue_id',
+                                     venue_values, batch, report)
+    return created, stale + [HOME_KEY, VENUES_KEY]
+
+
+def import_shows(batch, report):
+    """Insert a batch of validated show rows.
+
+    The artists' unavailabilities and the venues' shows overlapping the
+    batch are loaded with one query each, then every row is checked in
+    memory: unavailabilities through an interval tree per artist, venue
+    double bookings (against the database and within the file) with a
+    sweep line.
+    """
+    max_hours = current_app.config['MAX_SHOW_DURATION_HOURS']
+    max_length = max_show_length()
+    rows = []
+    for row in batch:
+        if not row.valid:
+            continue
+        try:
+            row.artist_id = int(row.data['artist_id'])
+            row.venue_id = int(row.data['venue_id'])
+        except (TypeError, ValueError):
+            report.reject(row, "artist_id and venue_id must be numbers")
+            continue
+        row.start_time = row.data['start_time']
+        row.end_time = row.start_time + timedelta(minutes=row.data['duration'])
+        if row.end_time - row.start_time > max_length:
+            report.reject(row, "duration: a show can not last more than "
+                               "{} hours".format(max_hours))
+            continue
+        rows.append(row)
+    if not rows:
+        return 0, []
+
+    artist_ids = {id for id, in db.session.query(Artist.id).filter(
+        Artist.id.in_({row.artist_id for row in rows}))}
+    venue_ids = {id for id, in db.session.query(Venue.id).filter(
+        Venue.id.in_({row.venue_id for row in rows}))}
+    known = []
+    for row in rows:
+        if row.artist_id not in artist_ids:
+            report.reject(row, "artist_id: no artist {}".format(row.artist_id))
+        elif row.venue_id not in venue_ids:
+            report.reject(row, "venue_id: no venue {}".format(row.venue_id))
+        else:
+            known.append(row)
+    if not known:
+        return 0, []
+
+    dialect = db.session.get_bind().dialect.name
+    span_start = min(row.start_time for row in known)
+    span_end = max(row.end_time for row in known)
+
+    windows = defaultdict(list)
+    for artist_id, start_time, end_time in db.session.query(
+            Unavailability.artist_id, Unavailability.start_time,
+            Unavailability.end_time) \
+            .filter(Unavailability.artist_id.in_(artist_ids),
+                    availability.overlap(dialect, Unavailability,
+                                         span_start, span_end)):
+        windows[artist_id].append((start_time, end_time))
+    trees = {artist_id: availability.IntervalTree(artist_windows)
+             for artist_id, artist_windows in windows.items()}
+
+    candidates = []
+    for row in known:
+        tree = trees.get(row.artist_id)
+        if tree is not None and not tree.is_free(row.start_time, row.end_time):
+            report.reject(row, "start_time: the artist is unavailable "
+                               "at that time")
+        else:
+            candidates.append(row)
+
+    # existing shows carry no row
+    bookings = [(venue_id, start_time, end_time, None)
+                for venue_id, start_time, end_time in db.session.query(
+                    Show.venue_id, Show.start_time, Show.end_time)
+                .filter(Show.venue_id.in_(venue_ids),
+                        availability.overlap(dialect, Show,
+                                             span_start, span_end,
+                                             max_length=max_length))]
+    bookings += [(row.venue_id, row.start_time, row.end_time, row)
+                 for row in candidates]
+    bookings.sort(key=lambda booking: booking[:2])
+    conflicting = set()
+    for first, second in availability.sweep_conflicts(bookings):
+        first_row, second_row = first[3], second[3]
+        if first_row is None and second_row is None:
+            continue
+        if second_row is None:
+            conflicting.add(first_row)
+        elif first_row not in conflicting:
+            # of two rows of the file, the one starting first wins
+            conflicting.add(second_row)
+    for row in candidates:
+        if row in conflicting:
+            report.reject(row, "start_time: the venue already has a show "
+                               "at that time")
+    accepted = [row for row in candidates if row not in conflicting]
+    if not accepted:
+        return 0, []
+
+    db.session.execute(Show.__table__.insert(), [
+        {"artist_id": row.artist_id, "venue_id": row.venue_id,
+         "start_time": row.start_time, "end_time": row.end_time}
+        for row in accepted
+    ])
+    # bulk inserts skip the Show events, redo their work per owner
+    stale = [HOME_KEY, VENUES_KEY]
+    for model, show_owner_column, ids, key in (
+            (Venue, Show.venue_id, {row.venue_id for row in accepted},
+             venue_key),
+            (Artist, Show.artist_id, {row.artist_id for row in accepted},
+             artist_key)):
+        refresh_upcoming_show_counts(model, show_owner_column, ids)
+        touch(model, ids)
+        stale += [key(id) for id in ids]
+    return len(accepted), stale
+
+
+IMPORTERS = {
+    'artists': (ArtistForm, import_artists),
+    'venues': (VenueForm, import_venues),
+    'shows': (ShowForm, import_shows),
+}
+
+
+def import_file(kind, lines, format, batch_size=None):
+    """Stream a CSV or NDJSON file of `kind` rows into the database.
+
+    Rows are validated with the same form as the HTML pages and inserted
+    in batches of IMPORT_BATCH_SIZE, one transaction each. Invalid rows
+    and failed batches are reported by line, the rest of the file still
+    goes in.
+    """
+    form_class, import_batch = IMPORTERS[kind]
+    batch_size = batch_size or current_app.config['IMPORT_BATCH_SIZE']
+    report = importer.ImportReport()
+    rows = importer.validate_rows(importer.read_rows(lines, format),
+                                  form_class, report)
+    for batch in importer.batched(rows, batch_size):
+        try:
+            created, stale = import_batch(batch, report)
+            db.session.commit()
+        except Exception as error:
+            db.session.rollback()
+            current_app.logger.exception("import: a batch of %s failed", kind)
+            # the database's message, without the statement SQLAlchemy adds
+            reason = getattr(error, 'orig', None) or error
+            for row in batch:
+                if row.valid:
+                    report.reject(row, "the batch could not be saved: {}"
+                                  .format(reason))
+            continue
+        report.created += created
+        cache.delete(*stale)
+    db.session.close()
+    return report
+
+
+@bp.route('/import', methods=['GET'])
+def import_form():
+    form = ImportForm()
+    return render_template('forms/import.html', form=form)
+
+
+@bp.route('/import', methods=['POST'])
+def import_submission():
+    form = ImportForm()
+    if not form.validate():
+        flash("Oops!, input data not valid. please check your input!")
+        return render_template('forms/import.html', form=form)
+
+    upload = form.file.data
+    format = form.format.data or importer.format_of(upload.filename)
+    lines = io.TextIOWrapper(upload.stream, encoding='utf-8', newline='')
+    report = import_file(form.kind.data, lines, format)
+
+    flash("Import finished: {}.".format(report))
+    return render_template('forms/import.html', form=form, report=report)
@@ -0,0 +1,160 @@
+import json
+import logging
+import time
+
+from flask import current_app, g, has_app_context, has_request_context, \
+    request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+import query_plans
+
+# One JSON object per line, see init_app() for the fields
+request_log = logging.getLogger('fyyur.requests')
+slow_query_log = logging.getLogger('fyyur.slow_queries')
+
+
+class RequestStats:
+    """SQL work done while handling one request."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.rows = 0
+
+    def add_rows(self, count):
+        self.rows += count
+
+    def server_timing(self, total):
+        return 'db;dur={:.1f};desc="{} queries, {} rows", total;dur={:.1f}' \
+            .format(self.db_time * 1000, self.queries, self.rows,
+                    total * 1000)
+
+
+def track_rows(result, on_rows):
+    """Call `on_rows(count)` for every batch of rows fetched from `result`."""
+    # every fetch method of a 1.3 ResultProxy goes through process_rows
+    process_rows = result.process_rows
+
+    def counting_process_rows(rows):
+        rows = process_rows(rows)
+        on_rows(len(rows))
+        return rows
+    result.process_rows = counting_process_rows
+
+
+def _current_stats():
+    return g.get('sql_stats') if has_app_context() else None
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context,
+                           executemany):
+    context._instrumentation_started = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context,
+                          executemany):
+    elapsed = time.perf_counter() - context._instrumentation_started
+    stats = _current_stats()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_time += elapsed
+
+    if not has_app_context():
+        return
+    threshold = current_app.config.get('SLOW_QUERY_THRESHOLD_MS')
+    if threshold is not None and elapsed * 1000 >= threshold:
+        _log_slow_query(conn, statement, parameters, executemany, elapsed)
+
+
+def _after_execute(conn, clauseelement, multiparams, params, result):
+    stats = _current_stats()
+    if stats is not None and result.returns_rows:
+        track_rows(result, stats.add_rows)
+
+
+def _log_slow_query(conn, statement, parameters, executemany, elapsed):
+    entry = {
+        "duration_ms": round(elapsed * 1000, 1),
+        "statement": statement,
+        "parameters": parameters,
+        "executemany": executemany,
+    }
+    if executemany:
+        # one row stands for the batch
+        entry["rows"] = len(parameters)
+        entry["parameters"] = parameters[0] if parameters else None
+    # large IN lists and text values would bloat the log
+    serialized = json.dumps(entry["parameters"], default=str)
+    limit = current_app.config['SLOW_QUERY_MAX_PARAMETERS_LENGTH']
+    if len(serialized) > limit:
+        entry["parameters"] = serialized[:limit] + '...'
+    if has_request_context():
+        entry["method"] = request.method
+        entry["path"] = request.full_path
+    if current_app.config.get('SLOW_QUERY_EXPLAIN') and not executemany \
+            and statement.lstrip().upper().startswith('SELECT'):
+        try:
+            entry["plan"] = query_plans.explain(conn, statement, parameters,
+                                                analyze=True)
+        except Exception as error:
+            entry["plan_error"] = str(error)
+    slow_query_log.warning(json.dumps(entry, default=str))
+
+
+def _log_request(entry, stats):
+    entry.update({
+        "duration_ms": round((time.perf_counter() - stats.started) * 1000, 1),
+        "queries": stats.queries,
+        "db_ms": round(stats.db_time * 1000, 1),
+        "rows": stats.rows,
+    })
+    request_log.info(json.dumps(entry))
+
+
+def listen():
+    """Instrument every engine, once per process."""
+    for name, listener in (('before_cursor_execute', _before_cursor_execute),
+                           ('after_cursor_execute', _after_cursor_execute),
+                           ('after_execute', _after_execute)):
+        if not event.contains(Engine, name, listener):
+            event.listen(Engine, name, listener)
+
+
+def init_app(app):
+    """Count queries, database time and rows of every request.
+
+    They are sent back in a Server-Timing header (when SERVER_TIMING is
+    on) and logged as one JSON line per request on `fyyur.requests`.
+    Streamed pages are logged once their body is sent, the header only
+    covers the work done before it.
+    """
+    listen()
+
+    @app.before_request
+    def start_request_stats():
+        g.sql_stats = RequestStats()
+
+    @app.after_request
+    def report_request_stats(response):
+        stats = g.get('sql_stats')
+        if stats is None:
+            return response
+        if app.config.get('SERVER_TIMING'):
+            # a streamed body still queries after the headers are sent
+            response.headers.add('Server-Timing', stats.server_timing(
+                time.perf_counter() - stats.started))
+        entry = {
+            "method": request.method,
+            "path": request.full_path,
+            "endpoint": request.endpoint,
+            "status": response.status_code,
+        }
+        if response.is_streamed:
+            # keep counting while the body streams, log once it is sent
+            response.call_on_close(lambda: _log_request(entry, stats))
+        else:
+            g.pop('sql_stats')
+            _log_request(entry, stats)
+        return response
@@ -0,0 +1,107 @@
+from functools import lru_cache
+
+import babel.dates
+import dateutil.parser
+from flask import Blueprint, current_app, render_template
+from sqlalchemy.orm import Load
+
+from cache import cached
+from models import db, Artist, Venue
+from pages import HOME_KEY, cache
+from replicas import read_only
+
+bp = Blueprint('main', __name__)
+
+#----------------------------------------------------------------------------#
+# Filters.
+#----------------------------------------------------------------------------#
+
+# Babel patterns of the named formats of the datetime filter
+DATETIME_FORMATS = {
+    'full': "EEEE MMMM, d, y 'at' h:mma",
+    'medium': "EE MM, dd, y h:mma",
+}
+
+
+# parsing patterns and loading locale or timezone data costs more than
+# formatting, each is done once per process
+@lru_cache(maxsize=None)
+def datetime_pattern(format):
+    return babel.dates.parse_pattern(DATETIME_FORMATS.get(format, format))
+
+
+@lru_cache(maxsize=None)
+def babel_locale(identifier):
+    return babel.Locale.parse(identifier)
+
+
+@lru_cache(maxsize=None)
+def timezone(name):
+    return babel.dates.get_timezone(name)
+
+
+@bp.app_template_filter('datetime')
+def format_datetime(value, format='medium'):
+    """Format a datetime in DISPLAY_TIMEZONE.
+
+    Naive datetimes, as stored, are taken to be in that timezone already,
+    aware ones are converted to it. Strings are still parsed, but cost
+    far more per call.
+    """
+    if isinstance(value, str):
+        value = dateutil.parser.parse(value)
+    config = current_app.config
+    tz = timezone(config['DISPLAY_TIMEZONE'])
+    if value.tzinfo is None:
+        value = tz.localize(value)
+    else:
+        value = tz.normalize(value.astimezone(tz))
+    return datetime_pattern(format).apply(
+        value, babel_locale(config['DISPLAY_LOCALE']))
+
+
+#----------------------------------------------------------------------------#
+# Controllers.
+#----------------------------------------------------------------------------#
+
+@bp.route('/')
+@read_only
+def index():
+    latest = cached(cache, HOME_KEY, latest_listings)
+    return render_template('pages/home.html', latest=latest)
+
+
+def latest_listings():
+    artists_result = db.session.query(Artist) \
+        .options(Load(Artist).load_only('name', "created_at")) \
+        .order_by(Artist.created_at.desc()).limit(10).all()
+
+    venues_result = db.session.query(Venue) \
+        .options(Load(Venue).load_only('name', "created_at")) \
+        .order_by(Venue.created_at.desc()).limit(10).all()
+
+    def mapper_factory(type):
+        def mapper(model):
+            return {
+                "type": type,
+                "id": model.id,
+                "name": model.name,
+                "created_at": model.created_at
+            }
+        return mapper
+
+    artists = list(map(mapper_factory('artist'), artists_result))
+    venues = list(map(mapper_factory('venue'), venues_result))
+
+    all_models = venues + artists
+    return sorted(all_models, key=lambda x: x['id'], reverse=True)[:10]
+
+
+@bp.app_errorhandler(404)
+def not_found_error(error):
+    return render_template('errors/404.html'), 404
+
+
+@bp.app_errorhandler(500)
+def server_error(error):
+    return render_template('errors/500.html'), 500
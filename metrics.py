@@ -0,0 +1,171 @@
+import os
+import time
+import weakref
+
+from flask import Response, g, request
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, \
+    Counter, Gauge, Histogram, REGISTRY, generate_latest, multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Prefork servers must export prometheus_multiproc_dir, an empty directory
+# shared by the workers, before the app is imported. Each process then
+# writes its samples there and /metrics merges them.
+MULTIPROCESS_DIR = os.environ.get('prometheus_multiproc_dir')
+
+REQUEST_LATENCY = Histogram(
+    'fyyur_request_duration_seconds', "Request latency by endpoint.",
+    ['endpoint', 'method', 'status'],
+    buckets=(.005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10))
+REQUESTS_IN_PROGRESS = Gauge(
+    'fyyur_requests_in_progress', "Requests being handled.",
+    ['endpoint'], multiprocess_mode='livesum')
+
+POOL_CHECKOUTS = Counter(
+    'fyyur_db_pool_checkouts_total', "Connections checked out of the pool.",
+    ['pool'])
+POOL_CHECKED_OUT = Gauge(
+    'fyyur_db_pool_checked_out', "Connections currently checked out.",
+    ['pool'], multiprocess_mode='livesum')
+POOL_OVERFLOW = Gauge(
+    'fyyur_db_pool_overflow', "Connections open beyond pool_size.",
+    ['pool'], multiprocess_mode='livesum')
+POOL_WAIT = Histogram(
+    'fyyur_db_pool_wait_seconds', "Time spent getting a pooled connection.",
+    ['pool'],
+    buckets=(.0005, .001, .005, .01, .05, .1, .5, 1, 5, 30))
+
+CACHE_HITS = Counter(
+    'fyyur_cache_hits_total', "Page cache hits by key kind.", ['kind'])
+CACHE_MISSES = Counter(
+    'fyyur_cache_misses_total', "Page cache misses by key kind.", ['kind'])
+
+
+class MeteredCache:
+    """Wraps a cache from cache.py, counting hits and misses per kind of
+    key ('venue:12' counts as 'venue')."""
+
+    def __init__(self, cache):
+        self.cache = cache
+
+    def get(self, key, valid=None):
+        """The value at `key`, or None. A value failing `valid` (an
+        outdated version for instance) is returned as None and counted
+        as a miss."""
+        value = self.cache.get(key)
+        if value is not None and valid is not None and not valid(value):
+            value = None
+        counter = CACHE_MISSES if value is None else CACHE_HITS
+        counter.labels(key.split(':', 1)[0]).inc()
+        return value
+
+    def set(self, key, value):
+        self.cache.set(key, value)
+
+    def delete(self, *keys):
+        self.cache.delete(*keys)
+
+
+def _time_waits(pool, name):
+    # pools have no event for when a checkout starts waiting
+    do_get = pool._do_get
+    wait = POOL_WAIT.labels(name)
+
+    def timed_do_get():
+        started = time.perf_counter()
+        try:
+            return do_get()
+        finally:
+            wait.observe(time.perf_counter() - started)
+    pool._do_get = timed_do_get
+
+
+def instrument_pool(pool, name):
+    """Report checkouts, checked out and overflow connections and wait
+    time of a pool, labelled with `name`: the primary and each replica
+    have their own."""
+    checkouts = POOL_CHECKOUTS.labels(name)
+    checked_out = POOL_CHECKED_OUT.labels(name)
+    overflow = POOL_OVERFLOW.labels(name)
+
+    def update_gauges():
+        # only QueuePool keeps these counts
+        if hasattr(pool, 'checkedout'):
+            checked_out.set(pool.checkedout())
+            overflow.set(max(pool.overflow(), 0))
+
+    @event.listens_for(pool, 'checkout')
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        checkouts.inc()
+        update_gauges()
+
+    @event.listens_for(pool, 'checkin')
+    def checkin(dbapi_connection, connection_record):
+        update_gauges()
+
+    _time_waits(pool, name)
+
+
+_instrumented_pools = weakref.WeakSet()
+
+
+def _engine_connect(connection, branch):
+    # engines are created lazily and dispose() replaces their pool (after
+    # a fork for instance), so pools are picked up on first use
+    pool = connection.engine.pool
+    if pool not in _instrumented_pools:
+        _instrumented_pools.add(pool)
+        # bind_name is set by RoutingSQLAlchemy.get_engine()
+        instrument_pool(
+            pool, getattr(connection.engine, 'bind_name', 'primary'))
+
+
+def registry():
+    if MULTIPROCESS_DIR is None:
+        return REGISTRY
+    merged = CollectorRegistry()
+    multiprocess.MultiProcessCollector(merged)
+    return merged
+
+
+def mark_process_dead(pid):
+    """Drop the live gauges of a worker that exited, call it from the
+    server's child exit hook."""
+    if MULTIPROCESS_DIR is not None:
+        multiprocess.mark_process_dead(pid)
+
+
+def init_app(app):
+    """Time every request, watch every connection pool and serve the
+    samples at /metrics."""
+    if not event.contains(Engine, 'engine_connect', _engine_connect):
+        event.listen(Engine, 'engine_connect', _engine_connect)
+
+    def endpoint():
+        return request.endpoint or 'unknown'
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_started = time.perf_counter()
+        g.metrics_endpoint = endpoint()
+        REQUESTS_IN_PROGRESS.labels(g.metrics_endpoint).inc()
+
+    @app.after_request
+    def observe_request(response):
+        started = g.get('metrics_started')
+        if started is not None:
+            REQUEST_LATENCY \
+                .labels(endpoint(), request.method, response.status_code) \
+                .observe(time.perf_counter() - started)
+        return response
+
+    @app.teardown_request
+    def end_request_metrics(error=None):
+        endpoint = g.pop('metrics_endpoint', None)
+        if endpoint is not None:
+            REQUESTS_IN_PROGRESS.labels(endpoint).dec()
+
+    @app.route('/metrics')
+    def metrics():
+        return Response(generate_latest(registry()),
+                        mimetype=CONTENT_TYPE_LATEST)
@@ -0,0 +1,67 @@
+"""Add search indexes
+
+Revision ID: 3f1c2b9d7e41
+Revises: a7eaa938d1aa
+Create Date: 2026-10-18 09:12:40.512301
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c2b9d7e41'
+down_revision = 'a7eaa938d1aa'
+branch_labels = None
+depends_on = None
+
+SEARCHABLE_TABLES = ('artists', 'venues')
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for table in SEARCHABLE_TABLES:
+            # serves ILIKE '%term%' and similarity() ranking on name
+            op.execute('CREATE INDEX ix_{0}_name_trgm ON {0} '
+                       'USING gin (name gin_trgm_ops)'.format(table))
+            # must match search.search_document()
+            op.execute("CREATE INDEX ix_{0}_search ON {0} "
+                       "USING gin (to_tsvector('simple', name || ' ' || city))"
+                       .format(table))
+    elif dialect == 'sqlite':
+        for table in SEARCHABLE_TABLES:
+            op.execute("CREATE VIRTUAL TABLE {0}_fts USING fts5("
+                       "name, city, content='{0}', content_rowid='id')"
+                       .format(table))
+            op.execute("CREATE TRIGGER {0}_fts_ai AFTER INSERT ON {0} BEGIN "
+                       "INSERT INTO {0}_fts(rowid, name, city) "
+                       "VALUES (new.id, new.name, new.city); END".format(table))
+            op.execute("CREATE TRIGGER {0}_fts_ad AFTER DELETE ON {0} BEGIN "
+                       "INSERT INTO {0}_fts({0}_fts, rowid, name, city) "
+                       "VALUES ('delete', old.id, old.name, old.city); END"
+                       .format(table))
+            # counters and updated_at change on every booking, only edits
+            # of the indexed columns resync the row
+            op.execute("CREATE TRIGGER {0}_fts_au AFTER UPDATE OF name, city "
+                       "ON {0} BEGIN "
+                       "INSERT INTO {0}_fts({0}_fts, rowid, name, city) "
+                       "VALUES ('delete', old.id, old.name, old.city); "
+                       "INSERT INTO {0}_fts(rowid, name, city) "
+                       "VALUES (new.id, new.name, new.city); END".format(table))
+            op.execute("INSERT INTO {0}_fts({0}_fts) VALUES ('rebuild')"
+                       .format(table))
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        for table in SEARCHABLE_TABLES:
+            op.drop_index('ix_{}_search'.format(table), table_name=table)
+            op.drop_index('ix_{}_name_trgm'.format(table), table_name=table)
+    elif dialect == 'sqlite':
+        for table in SEARCHABLE_TABLES:
+            for suffix in ('ai', 'ad', 'au'):
+                op.execute('DROP TRIGGER {}_fts_{}'.format(table, suffix))
+            op.execute('DROP TABLE {}_fts'.format(table))
@@ -0,0 +1,30 @@
+"""Add updated_at to venues, artists and shows
+
+Revision ID: 4d2f8a6c9b13
+Revises: e7a93b5c1d28
+Create Date: 2026-10-18 13:21:47.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '4d2f8a6c9b13'
+down_revision = 'e7a93b5c1d28'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    for table in ('venues', 'artists', 'shows'):
+        op.add_column(table, sa.Column('updated_at', sa.DateTime(), server_default=sa.func.now(), nullable=False))
+    op.create_index(op.f('ix_venues_updated_at'), 'venues', ['updated_at'], unique=False)
+    op.create_index(op.f('ix_artists_updated_at'), 'artists', ['updated_at'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_artists_updated_at'), table_name='artists')
+    op.drop_index(op.f('ix_venues_updated_at'), table_name='venues')
+    for table in ('venues', 'artists', 'shows'):
+        op.drop_column(table, 'updated_at')
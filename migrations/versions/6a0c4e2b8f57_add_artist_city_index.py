@@ -0,0 +1,28 @@
+"""Add artist city index
+
+Revision ID: 6a0c4e2b8f57
+Revises: b91e3c7f5a24
+Create Date: 2026-10-18 14:48:09.316254
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6a0c4e2b8f57'
+down_revision = 'b91e3c7f5a24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        op.create_index('ix_artists_city_id', 'artists', ['city', 'id'],
+                        unique=False, postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_artists_city_id', table_name='artists',
+                      postgresql_concurrently=True)
@@ -0,0 +1,81 @@
+"""Normalize genres
+
+Revision ID: 8b4e6d0a2c17
+Revises: 3f1c2b9d7e41
+Create Date: 2026-10-18 10:41:05.220917
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8b4e6d0a2c17'
+down_revision = '3f1c2b9d7e41'
+branch_labels = None
+depends_on = None
+
+GENRES = ['Alternative', 'Blues', 'Classical', 'Country', 'Electronic',
+          'Folk', 'Funk', 'Hip-Hop', 'Heavy Metal', 'Instrumental', 'Jazz',
+          'Musical Theatre', 'Pop', 'Punk', 'R&B', 'Reggae', 'Rock n Roll',
+          'Soul', 'Other']
+
+OWNERS = (('artist', 'artists'), ('venue', 'venues'))
+
+
+def upgrade():
+    genres = op.create_table('genres',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=120), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    for owner, table in OWNERS:
+        op.create_table('{}_genres'.format(owner),
+        sa.Column('{}_id'.format(owner), sa.Integer(), nullable=False),
+        sa.Column('genre_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['{}_id'.format(owner)], ['{}.id'.format(table)], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['genre_id'], ['genres.id'], ),
+        sa.PrimaryKeyConstraint('{}_id'.format(owner), 'genre_id')
+        )
+        op.create_index('ix_{}_genres_genre_id_{}_id'.format(owner, owner),
+                        '{}_genres'.format(owner),
+                        ['genre_id', '{}_id'.format(owner)], unique=False)
+
+    op.bulk_insert(genres, [{'name': name} for name in GENRES])
+
+    # backfill from the comma joined columns, keeping unknown genres too
+    for owner, table in OWNERS:
+        op.execute("""
+            INSERT INTO genres (name)
+            SELECT DISTINCT trim(item.genre_name)
+            FROM {table}, unnest(string_to_array({table}.genres, ',')) AS item (genre_name)
+            WHERE trim(item.genre_name) <> ''
+            ON CONFLICT (name) DO NOTHING
+        """.format(table=table))
+        op.execute("""
+            INSERT INTO {owner}_genres ({owner}_id, genre_id)
+            SELECT DISTINCT {table}.id, genres.id
+            FROM {table}
+            CROSS JOIN unnest(string_to_array({table}.genres, ',')) AS item (genre_name)
+            JOIN genres ON genres.name = trim(item.genre_name)
+        """.format(owner=owner, table=table))
+        op.drop_column(table, 'genres')
+
+
+def downgrade():
+    for owner, table in OWNERS:
+        op.add_column(table, sa.Column('genres', sa.String(length=120), nullable=True))
+        op.execute("""
+            UPDATE {table} SET genres = (
+                SELECT coalesce(string_agg(genres.name, ',' ORDER BY genres.name), '')
+                FROM {owner}_genres
+                JOIN genres ON genres.id = {owner}_genres.genre_id
+                WHERE {owner}_genres.{owner}_id = {table}.id
+            )
+        """.format(owner=owner, table=table))
+        op.alter_column(table, 'genres', nullable=False)
+        op.drop_index('ix_{}_genres_genre_id_{}_id'.format(owner, owner),
+                      table_name='{}_genres'.format(owner))
+        op.drop_table('{}_genres'.format(owner))
+    op.drop_table('genres')
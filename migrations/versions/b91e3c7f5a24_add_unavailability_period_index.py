@@ -0,0 +1,38 @@
+"""Add unavailability period index
+
+Revision ID: b91e3c7f5a24
+Revises: 4d2f8a6c9b13
+Create Date: 2026-10-18 14:02:31.877465
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b91e3c7f5a24'
+down_revision = '4d2f8a6c9b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        # other backends use ix_unavailabilities_artist_id_end_time
+        return
+    # btree_gist lets the integer artist_id share a GiST index with a range
+    op.execute('CREATE EXTENSION IF NOT EXISTS btree_gist')
+    with op.get_context().autocommit_block():
+        # must match availability.period()
+        op.execute("CREATE INDEX CONCURRENTLY ix_unavailabilities_artist_id_period "
+                   "ON unavailabilities "
+                   "USING gist (artist_id, tsrange(start_time, end_time, '[)'))")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_unavailabilities_artist_id_period',
+                      table_name='unavailabilities',
+                      postgresql_concurrently=True)
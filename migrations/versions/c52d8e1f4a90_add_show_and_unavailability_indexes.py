@@ -0,0 +1,41 @@
+"""Add show and unavailability indexes
+
+Revision ID: c52d8e1f4a90
+Revises: 8b4e6d0a2c17
+Create Date: 2026-10-18 11:27:52.093518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c52d8e1f4a90'
+down_revision = '8b4e6d0a2c17'
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    ('ix_shows_venue_id_start_time', 'shows', ['venue_id', 'start_time']),
+    ('ix_shows_artist_id_start_time', 'shows', ['artist_id', 'start_time']),
+    ('ix_shows_start_time_id', 'shows', ['start_time', 'id']),
+    ('ix_unavailabilities_artist_id_end_time', 'unavailabilities',
+     ['artist_id', 'end_time']),
+    ('ix_artists_created_at', 'artists', ['created_at']),
+    ('ix_venues_created_at', 'venues', ['created_at']),
+]
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False,
+                            postgresql_concurrently=True)
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table, columns in reversed(INDEXES):
+            op.drop_index(name, table_name=table,
+                          postgresql_concurrently=True)
@@ -0,0 +1,49 @@
+"""Add show end time
+
+Revision ID: d3f7a1b6e920
+Revises: 6a0c4e2b8f57
+Create Date: 2026-10-18 15:36:12.548903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd3f7a1b6e920'
+down_revision = '6a0c4e2b8f57'
+branch_labels = None
+depends_on = None
+
+# existing shows get config.SHOW_DURATION_HOURS
+DEFAULT_DURATION_HOURS = 3
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    op.add_column('shows', sa.Column('end_time', sa.DateTime(), nullable=True))
+    if dialect == 'postgresql':
+        op.execute("UPDATE shows SET end_time = start_time + interval '{} hours'"
+                   .format(DEFAULT_DURATION_HOURS))
+    else:
+        op.execute("UPDATE shows SET end_time = datetime(start_time, '+{} hours')"
+                   .format(DEFAULT_DURATION_HOURS))
+    with op.batch_alter_table('shows') as batch_op:
+        batch_op.alter_column('end_time', existing_type=sa.DateTime(),
+                              nullable=False)
+
+    if dialect == 'postgresql':
+        with op.get_context().autocommit_block():
+            # must match availability.period(), serves available_artists()
+            op.execute("CREATE INDEX CONCURRENTLY ix_shows_artist_id_period "
+                       "ON shows "
+                       "USING gist (artist_id, tsrange(start_time, end_time, '[)'))")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            op.drop_index('ix_shows_artist_id_period', table_name='shows',
+                          postgresql_concurrently=True)
+    with op.batch_alter_table('shows') as batch_op:
+        batch_op.drop_column('end_time')
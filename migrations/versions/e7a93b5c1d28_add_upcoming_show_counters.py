@@ -0,0 +1,35 @@
+"""Add upcoming show counters
+
+Revision ID: e7a93b5c1d28
+Revises: c52d8e1f4a90
+Create Date: 2026-10-18 12:05:13.661842
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e7a93b5c1d28'
+down_revision = 'c52d8e1f4a90'
+branch_labels = None
+depends_on = None
+
+OWNERS = (('venues', 'venue_id'), ('artists', 'artist_id'))
+
+
+def upgrade():
+    for table, owner_column in OWNERS:
+        op.add_column(table, sa.Column('upcoming_show_count', sa.Integer(), server_default='0', nullable=False))
+        op.execute("""
+            UPDATE {table} SET upcoming_show_count = (
+                SELECT count(shows.id) FROM shows
+                WHERE shows.{owner_column} = {table}.id
+                AND shows.start_time >= current_date
+            )
+        """.format(table=table, owner_column=owner_column))
+
+
+def downgrade():
+    for table, owner_column in OWNERS:
+        op.drop_column(table, 'upcoming_show_count')
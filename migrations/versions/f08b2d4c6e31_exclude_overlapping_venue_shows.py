@@ -0,0 +1,35 @@
+"""Exclude overlapping shows at a venue
+
+Fails if the venue already has overlapping shows: list them with
+`flask show-conflicts`, fix them and upgrade again.
+
+Revision ID: f08b2d4c6e31
+Revises: d3f7a1b6e920
+Create Date: 2026-10-18 15:52:40.117306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f08b2d4c6e31'
+down_revision = 'd3f7a1b6e920'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    # the constraint's GiST index also serves shows.venue_bookings(), the
+    # range must match availability.period()
+    op.execute("ALTER TABLE shows ADD CONSTRAINT shows_venue_id_period_excl "
+               "EXCLUDE USING gist "
+               "(venue_id WITH =, tsrange(start_time, end_time, '[)') WITH &&)")
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_constraint('shows_venue_id_period_excl', 'shows')
@@ -0,0 +1,237 @@
+from sqlalchemy import event, func
+
+from replicas import RoutingSQLAlchemy
+from utils import start_of_today
+
+# bound to the app by create_app(), importing the models needs no app
+db = RoutingSQLAlchemy()
+
+#----------------------------------------------------------------------------#
+# Models.
+#----------------------------------------------------------------------------#
+
+
+class Genre(db.Model):
+    __tablename__ = 'genres'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(120), nullable=False, unique=True)
+
+
+# (genre_id, owner_id) indexes serve browsing an owner list by genre
+artist_genres = db.Table(
+    'artist_genres',
+    db.Column('artist_id', db.Integer,
+              db.ForeignKey('artists.id', ondelete='CASCADE'),
+              primary_key=True),
+    db.Column('genre_id', db.Integer,
+              db.ForeignKey('genres.id'),
+              primary_key=True),
+    db.Index('ix_artist_genres_genre_id_artist_id', 'genre_id', 'artist_id'))
+
+venue_genres = db.Table(
+    'venue_genres',
+    db.Column('venue_id', db.Integer,
+              db.ForeignKey('venues.id', ondelete='CASCADE'),
+              primary_key=True),
+    db.Column('genre_id', db.Integer,
+              db.ForeignKey('genres.id'),
+              primary_key=True),
+    db.Index('ix_venue_genres_genre_id_venue_id', 'genre_id', 'venue_id'))
+
+
+class Venue(db.Model):
+    __tablename__ = 'venues'
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String, nullable=False)
+    city = db.Column(db.String(120), nullable=False)
+    state = db.Column(db.String(120), nullable=False)
+    address = db.Column(db.String(120))
+    phone = db.Column(db.String(120))
+    image_link = db.Column(db.String(500))
+    facebook_link = db.Column(db.String(120), unique=True)
+    website = db.Column(db.String(120))
+    seeking_talent = db.Column(db.Boolean(), default=False)
+    seeking_description = db.Column(db.Text())
+    # maintained by the Show events below and `flask refresh-show-counts`
+    upcoming_show_count = db.Column(db.Integer, nullable=False,
+                                    default=0, server_default='0')
+    created_at = db.Column(db.DateTime(), nullable=False,
+                           server_default=func.now(), index=True)
+    # version of everything the entity's page shows, see pages.conditional()
+    updated_at = db.Column(db.DateTime(), nullable=False,
+                           server_default=func.now(), onupdate=func.now(),
+                           index=True)
+
+    # Add many-to-many relationship with Artist through Show model
+    artists = db.relationship(
+        'Artist', secondary='shows',
+        backref='venues',
+        lazy=True)
+    shows = db.relationship('Show', backref="venue", lazy=True)
+    genres = db.relationship('Genre', secondary=venue_genres,
+                             order_by=Genre.name, lazy=True)
+
+
+class Artist(db.Model):
+    __tablename__ = 'artists'
+    __table_args__ = (
+        # walks one city in id order for available_artists()
+        db.Index('ix_artists_city_id', 'city', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String, nullable=False)
+    city = db.Column(db.String(120), nullable=False)
+    state = db.Column(db.String(120), nullable=False)
+    phone = db.Column(db.String(120))
+    image_link = db.Column(db.String(500))
+    facebook_link = db.Column(db.String(120), unique=True)
+    website = db.Column(db.String(120))
+    seeking_venue = db.Column(db.Boolean(), default=False)
+    seeking_description = db.Column(db.Text())
+    # maintained by the Show events below and `flask refresh-show-counts`
+    upcoming_show_count = db.Column(db.Integer, nullable=False,
+                                    default=0, server_default='0')
+    created_at = db.Column(db.DateTime(), nullable=False,
+                           server_default=func.now(), index=True)
+    # version of everything the entity's page shows, see pages.conditional()
+    updated_at = db.Column(db.DateTime(), nullable=False,
+                           server_default=func.now(), onupdate=func.now(),
+                           index=True)
+
+    unavailabilities = db.relationship(
+        "Unavailability", backref='artist', lazy=True)
+    shows = db.relationship('Show', backref="artist", lazy=True)
+    genres = db.relationship('Genre', secondary=artist_genres,
+                             order_by=Genre.name, lazy=True)
+
+
+class Show(db.Model):
+    __tablename__ = 'shows'
+    __table_args__ = (
+        db.Index('ix_shows_venue_id_start_time', 'venue_id', 'start_time'),
+        db.Index('ix_shows_artist_id_start_time', 'artist_id', 'start_time'),
+        db.Index('ix_shows_start_time_id', 'start_time', 'id'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    artist_id = db.Column(db.Integer,
+                          db.ForeignKey('artists.id'),
+                          nullable=False)
+    venue_id = db.Column(db.Integer,
+                         db.ForeignKey('venues.id'),
+                         nullable=False)
+    start_time = db.Column(db.DateTime,
+                           nullable=False)
+    # on Postgres an exclusion constraint keeps shows at one venue from
+    # overlapping, see `flask show-conflicts` for other backends
+    end_time = db.Column(db.DateTime,
+                         nullable=False)
+    updated_at = db.Column(db.DateTime(), nullable=False,
+                           server_default=func.now(), onupdate=func.now())
+
+
+class Unavailability(db.Model):
+    __tablename__ = 'unavailabilities'
+    # on Postgres a GiST index on (artist_id, tsrange(start_time, end_time))
+    # serves availability checks, see availability.overlap()
+    __table_args__ = (
+        db.Index('ix_unavailabilities_artist_id_end_time',
+                 'artist_id', 'end_time'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    start_time = db.Column(db.DateTime,
+                           nullable=False)
+    end_time = db.Column(db.DateTime,
+                         nullable=False)
+
+    artist_id = db.Column(db.Integer,
+                          db.ForeignKey('artists.id'),
+                          nullable=False)
+
+
+def apply_show_change(connection, show, delta):
+    """Bump the version of the show's venue and artist, and move their
+    upcoming show counters by `delta` if the show is upcoming.
+
+    Runs on the flush connection, in the same transaction as the show.
+    """
+    upcoming = show.start_time >= start_of_today()
+    for model, id in ((Venue, show.venue_id), (Artist, show.artist_id)):
+        table = model.__table__
+        values = {"updated_at": func.now()}
+        if upcoming:
+            values["upcoming_show_count"] = table.c.upcoming_show_count + delta
+        connection.execute(
+            table.update()
+            .where(table.c.id == id)
+            .values(**values))
+
+
+@event.listens_for(Show, 'after_insert')
+def show_inserted(mapper, connection, show):
+    apply_show_change(connection, show, 1)
+
+
+@event.listens_for(Show, 'after_delete')
+def show_deleted(mapper, connection, show):
+    apply_show_change(connection, show, -1)
+
+
+def touch(model, ids):
+    """Bump the version of the `model` rows in `ids` (a list or subquery)."""
+    db.session.query(model) \
+        .filter(model.id.in_(ids)) \
+        .update({model.updated_at: func.now()}, synchronize_session=False)
+
+
+def refresh_upcoming_show_counts(model, show_owner_column, ids=None):
+    """Recompute the counters of `model` from the shows table.
+
+    Limited to `ids` (a list or subquery) when given, returns how many rows
+    had drifted.
+    """
+    table = model.__table__
+    counted = db.session.query(func.count(Show.id)) \
+        .filter(show_owner_column == table.c.id,
+                Show.start_time >= start_of_today()) \
+        .correlate(table) \
+        .as_scalar()
+
+    update = table.update() \
+        .where(table.c.upcoming_show_count != counted) \
+        .values(upcoming_show_count=counted)
+    if ids is not None:
+        update = update.where(table.c.id.in_(ids))
+    return db.session.execute(update).rowcount
+
+
+#----------------------------------------------------------------------------#
+# Genres.
+#----------------------------------------------------------------------------#
+
+def genres_from_names(names):
+    """Genre rows for the given names, creating the ones that are missing."""
+    names = set(names)
+    genres = Genre.query.filter(Genre.name.in_(names)).all() if names else []
+    missing = names - {genre.name for genre in genres}
+    return genres + [Genre(name=name) for name in sorted(missing)]
+
+
+def genre_ids(names):
+    """Ids of the named genres, inserting the missing ones in one statement."""
+    names = set(names)
+    if not names:
+        return {}
+    ids = dict(db.session.query(Genre.name, Genre.id)
+               .filter(Genre.name.in_(names)))
+    missing = names - set(ids)
+    if missing:
+        db.session.execute(Genre.__table__.insert(),
+                           [{"name": name} for name in sorted(missing)])
+        ids.update(db.session.query(Genre.name, Genre.id)
+                   .filter(Genre.name.in_(missing)))
+    return ids
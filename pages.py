@@ -0,0 +1,252 @@
+"""Helpers shared by the blueprints: loaders, the page cache, streamed
+listings and conditional requests."""
+from datetime import datetime
+
+import dateutil.parser
+from flask import Response, abort, current_app, get_flashed_messages, \
+    make_response, render_template, request, session, stream_with_context, \
+    url_for
+from sqlalchemy import func
+from sqlalchemy.orm import raiseload
+from werkzeug.local import LocalProxy
+
+import search
+from models import db, Genre, Show
+from utils import start_of_today
+
+#----------------------------------------------------------------------------#
+# Loaders.
+#----------------------------------------------------------------------------#
+
+
+def strict_loading():
+    """Query options that make every relationship raise instead of lazy load.
+
+    Only active with STRICT_LOADING, so an N+1 pattern that sneaks into a
+    page fails loudly in tests instead of silently firing a query per row.
+    """
+    if current_app.config['STRICT_LOADING']:
+        return [raiseload('*')]
+    return []
+
+
+def load_related(model, ids, *columns):
+    """Fetch the given columns of `model` for all `ids` with one IN query.
+
+    Returns a dict keyed by id, so mappers can look up the related entity
+    of each row without touching the relationship.
+    """
+    ids = set(ids)
+    if not ids:
+        return {}
+    rows = db.session.query(model.id, *columns) \
+        .filter(model.id.in_(ids)) \
+        .all()
+    return {row.id: row for row in rows}
+
+
+def parse_date_arg(name):
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return dateutil.parser.parse(value)
+    except (ValueError, OverflowError):
+        abort(400)
+
+
+def search_entities(model, endpoint):
+    """Ranked, paginated search results of venues or artists."""
+    search_term = request.args.get('search_term', '')
+    page = max(request.args.get('page', 1, type=int), 1)
+    per_page = current_app.config['SEARCH_RESULTS_PER_PAGE']
+
+    query = search.ranked(db.session.query(model.id, model.name,
+                                           model.upcoming_show_count),
+                          model, search_term)
+    count = query.order_by(None).count()
+    rows = query.limit(per_page).offset((page - 1) * per_page).all()
+
+    def mapper(row):
+        return {
+            "id": row.id,
+            "name": row.name,
+            "num_upcoming_shows": row.upcoming_show_count,
+        }
+
+    def page_url(page):
+        return url_for(endpoint, search_term=search_term, page=page)
+
+    response = {
+        "count": count,
+        "data": list(map(mapper, rows)),
+        "previous_url": page_url(page - 1) if page > 1 else None,
+        "next_url": page_url(page + 1) if page * per_page < count else None,
+    }
+    return response, search_term
+
+
+def browse_by_genre(model, association, owner_column, genre_name, *columns):
+    """One page of `model` rows tagged with a genre, keyset paginated by id.
+
+    Walks the (genre_id, owner_id) index of the association table, so the
+    cost of a page does not depend on the catalogue size.
+    """
+    per_page = current_app.config['GENRE_BROWSE_PER_PAGE']
+    after = request.args.get('after', 0, type=int)
+
+    rows = db.session.query(model.id, model.name, *columns) \
+        .join(association, owner_column == model.id) \
+        .join(Genre, Genre.id == association.c.genre_id) \
+        .filter(Genre.name == genre_name, model.id > after) \
+        .order_by(model.id) \
+        .limit(per_page + 1) \
+        .all()
+
+    page = rows[:per_page]
+    next_after = page[-1].id if len(rows) > per_page else None
+    return page, next_after
+
+
+#----------------------------------------------------------------------------#
+# Cache.
+#----------------------------------------------------------------------------#
+
+# the app's page cache, set up by create_app()
+cache = LocalProxy(lambda: current_app.extensions['cache'])
+
+HOME_KEY = 'home'
+VENUES_KEY = 'venues'
+ARTISTS_KEY = 'artists'
+
+
+def venue_key(venue_id):
+    return 'venue:{}'.format(venue_id)
+
+
+def artist_key(artist_id):
+    return 'artist:{}'.format(artist_id)
+
+
+def cached_version(key, etag, build):
+    """Like cache.cached(), for a page served under `etag`.
+
+    The ETag comes from the database, the cached data may not: other
+    workers and the CLI can not clear this process' cache. The entry keeps
+    the version it was built for and is rebuilt when that is not `etag`,
+    so a page is never sent under a newer ETag than its data.
+    """
+    entry = cache.get(key, valid=lambda entry: entry[0] == etag)
+    if entry is None:
+        entry = (etag, build())
+        cache.set(key, entry)
+    return entry[1]
+
+
+def invalidate_venue(venue_id):
+    """Drop the cached pages showing a venue, including its artists' pages."""
+    artist_ids = db.session.query(Show.artist_id) \
+        .filter(Show.venue_id == venue_id) \
+        .distinct()
+    cache.delete(HOME_KEY, VENUES_KEY, venue_key(venue_id),
+                 *(artist_key(artist_id) for artist_id, in artist_ids))
+
+
+def invalidate_artist(artist_id):
+    """Drop the cached pages showing an artist, including its venues' pages."""
+    venue_ids = db.session.query(Show.venue_id) \
+        .filter(Show.artist_id == artist_id) \
+        .distinct()
+    cache.delete(HOME_KEY, ARTISTS_KEY, artist_key(artist_id),
+                 *(venue_key(venue_id) for venue_id, in venue_ids))
+
+
+#----------------------------------------------------------------------------#
+# Listings.
+#----------------------------------------------------------------------------#
+
+# Pieces of template output sent together in a chunk of a streamed page
+STREAM_BUFFER_SIZE = 200
+
+
+def stream_template(template_name, **context):
+    """Render a template as a stream, sent while its loops advance.
+
+    Flask 1.1 has no stream_template, this is the recipe of its docs. The
+    request context stays up until the last chunk is sent.
+    """
+    # the session is saved before the body streams, take the flashes out
+    # of it now; the template gets them from the request context
+    get_flashed_messages()
+    app = current_app._get_current_object()
+    app.update_template_context(context)
+    stream = app.jinja_env.get_template(template_name).stream(context)
+    stream.enable_buffering(STREAM_BUFFER_SIZE)
+    return Response(stream_with_context(stream))
+
+
+def render_listing(template_name, name, key, etag, query, build):
+    """Render a listing of a whole table, the `build(rows)` of `query`
+    passed to the template as `name`.
+
+    Built once per `etag` into the page cache under `key`, or with
+    STREAM_LISTINGS, streamed: rows are fetched STREAM_BATCH_SIZE at a
+    time from a server-side cursor, built and written as they come.
+    """
+    config = current_app.config
+    if config['STREAM_LISTINGS']:
+        rows = query.yield_per(config['STREAM_BATCH_SIZE'])
+        return stream_template(template_name, **{name: build(rows)})
+    return render_template(template_name, **{
+        name: cached_version(key, etag, lambda: list(build(query)))})
+
+#----------------------------------------------------------------------------#
+# Conditional requests.
+#----------------------------------------------------------------------------#
+
+def conditional(etag, last_modified, render):
+    """Answer 304 when the client's copy matches, otherwise call `render`.
+
+    `last_modified` is a naive UTC datetime. Pages with pending flash
+    messages are always rendered, since the messages are part of the page.
+    """
+    last_modified = last_modified.replace(microsecond=0)
+    fresh = False
+    if '_flashes' not in session:
+        if request.if_none_match:
+            fresh = request.if_none_match.contains(etag)
+        elif request.if_modified_since:
+            fresh = last_modified <= request.if_modified_since.replace(tzinfo=None)
+
+    response = make_response('', 304) if fresh else make_response(render())
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # let browsers keep the page but revalidate it on every visit
+    response.cache_control.no_cache = True
+    return response
+
+
+def listing_version(model):
+    """Version of a whole listing, the count catches deleted rows."""
+    updated_at, count = db.session.query(func.max(model.updated_at),
+                                         func.count(model.id)).one()
+    updated_at = updated_at or datetime(1970, 1, 1)
+    return '{}-{}-{}'.format(model.__tablename__, updated_at.timestamp(),
+                             count), updated_at
+
+
+def page_version(model, id):
+    """Version of a venue or artist page, 404 when the entity is missing.
+
+    Past and upcoming shows are split by day, so the page also changes at
+    midnight.
+    """
+    updated_at = db.session.query(model.updated_at) \
+        .filter(model.id == id) \
+        .scalar()
+    if updated_at is None:
+        abort(404)
+    today = start_of_today()
+    etag = '{}-{}-{}-{}'.format(model.__tablename__, id,
+                                updated_at.timestamp(), today.date())
+    return etag, max(updated_at, today)
@@ -0,0 +1,121 @@
+import json
+from contextlib import contextmanager
+
+from sqlalchemy import event, inspect
+
+
+@contextmanager
+def capture_selects(engine):
+    """Record the (engine, statement, parameters) of every SELECT run on
+    `engine`.
+
+    Pass the Engine class to capture on every engine, replicas included.
+    """
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters,
+                              context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((conn.engine, statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+def _postgresql_seq_scans(connection, statement, parameters):
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + statement, parameters)
+        plan = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+
+    scans = []
+    nodes = [plan[0]['Plan']]
+    while nodes:
+        node = nodes.pop()
+        if node['Node Type'] == 'Seq Scan':
+            scans.append(node['Relation Name'])
+        nodes.extend(node.get('Plans', []))
+    return scans
+
+
+def _sqlite_seq_scans(connection, statement, parameters):
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute('EXPLAIN QUERY PLAN ' + statement, parameters)
+        details = [row[-1] for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+    scans = []
+    for detail in details:
+        # "SCAN shows" is a full scan, "SCAN shows USING INDEX ..." walks an
+        # index and "SCAN artists_fts VIRTUAL TABLE INDEX ..." is FTS5
+        words = detail.split()
+        if words[0] == 'SCAN' and 'INDEX' not in words:
+            scans.append(words[1])
+    return scans
+
+
+EXPLAINERS = {
+    'postgresql': _postgresql_seq_scans,
+    'sqlite': _sqlite_seq_scans,
+}
+
+
+def sequential_scans(statements, allowed_tables=()):
+    """Explain each captured statement on the engine that ran it and list
+    the full table scans.
+
+    Returns (statement, table) pairs for every scan of a table that is not
+    in `allowed_tables`.
+    """
+    by_engine = {}
+    for engine, statement, parameters in statements:
+        by_engine.setdefault(engine, []).append((statement, parameters))
+
+    found = []
+    for engine, engine_statements in by_engine.items():
+        explainer = EXPLAINERS.get(engine.dialect.name)
+        if explainer is None:
+            raise ValueError("Can not explain queries on {}"
+                             .format(engine.dialect.name))
+
+        # scans of subqueries and CTEs are not table scans
+        tables = set(inspect(engine).get_table_names()) - set(allowed_tables)
+
+        with engine.connect() as connection:
+            for statement, parameters in engine_statements:
+                for table in explainer(connection, statement, parameters):
+                    if table in tables:
+                        found.append((statement, table))
+    return found
+
+
+def explain(connection, statement, parameters, analyze=False):
+    """Text plan of a statement, or None on backends without EXPLAIN.
+
+    With `analyze` Postgres runs the statement again and reports actual
+    row counts and timings, only pass SELECTs.
+    """
+    dialect = connection.dialect.name
+    if dialect == 'postgresql':
+        prefix = 'EXPLAIN ANALYZE ' if analyze else 'EXPLAIN '
+    elif dialect == 'sqlite':
+        prefix = 'EXPLAIN QUERY PLAN '
+    else:
+        return None
+
+    cursor = connection.connection.cursor()
+    try:
+        cursor.execute(prefix + statement, parameters)
+        # one text line per row on Postgres, the detail column on SQLite
+        return '\n'.join(str(row[-1]) for row in cursor.fetchall())
+    finally:
+        cursor.close()
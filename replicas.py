@@ -0,0 +1,86 @@
+import random
+
+from flask import g, has_request_context, request
+from flask_sqlalchemy import SignallingSession, SQLAlchemy
+from sqlalchemy import orm
+from sqlalchemy.sql.expression import SelectBase
+
+# Set for READ_REPLICA_STICKY_SECONDS after a write, so the client reads
+# from the primary until the replicas have caught up with its changes
+STICKY_COOKIE = 'read_primary'
+
+READ_METHODS = ('GET', 'HEAD')
+
+
+def read_only(view):
+    """Mark a view as safe to answer from a read replica."""
+    view.read_only = True
+    return view
+
+
+class RoutingSession(SignallingSession):
+    """Sends the SELECTs of read-only requests to the replica picked for
+    the request, everything else to the primary."""
+
+    def __init__(self, db, **options):
+        self.db = db
+        super().__init__(db, **options)
+
+    def get_bind(self, mapper=None, clause=None):
+        replica = g.get('read_replica') if has_request_context() else None
+        if replica is None or self._flushing or \
+                (clause is not None and not isinstance(clause, SelectBase)):
+            return super().get_bind(mapper, clause)
+        return self.db.get_engine(self.app, bind=replica)
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """SQLAlchemy with RoutingSession and pool settings from the config."""
+
+    def create_session(self, options):
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+    def get_engine(self, app=None, bind=None):
+        engine = super().get_engine(app, bind)
+        # metrics labels the samples of the engine's pool with it
+        engine.bind_name = bind or 'primary'
+        return engine
+
+    def apply_driver_hacks(self, app, sa_url, options):
+        super().apply_driver_hacks(app, sa_url, options)
+        config = app.config
+        options.setdefault('pool_pre_ping', config['DATABASE_POOL_PRE_PING'])
+        options.setdefault('pool_recycle', config['DATABASE_POOL_RECYCLE'])
+        # SQLite files get a NullPool, which has no size or timeout
+        if sa_url.drivername.startswith('postgresql'):
+            options.setdefault('pool_size', config['DATABASE_POOL_SIZE'])
+            options.setdefault('max_overflow', config['DATABASE_MAX_OVERFLOW'])
+            options.setdefault('pool_timeout', config['DATABASE_POOL_TIMEOUT'])
+            timeout = config['DATABASE_STATEMENT_TIMEOUT_MS']
+            if timeout:
+                connect_args = options.setdefault('connect_args', {})
+                connect_args.setdefault(
+                    'options', '-c statement_timeout={:d}'.format(timeout))
+
+
+def init_app(app):
+    """Pick a replica for read-only requests, keep clients that just
+    wrote on the primary."""
+
+    @app.before_request
+    def choose_replica():
+        replicas = app.config['READ_REPLICA_BINDS']
+        view = app.view_functions.get(request.endpoint)
+        if replicas and getattr(view, 'read_only', False) and \
+                request.method in READ_METHODS and \
+                STICKY_COOKIE not in request.cookies:
+            g.read_replica = random.choice(replicas)
+
+    @app.after_request
+    def stick_to_primary(response):
+        sticky_seconds = app.config['READ_REPLICA_STICKY_SECONDS']
+        if app.config['READ_REPLICA_BINDS'] and sticky_seconds and \
+                request.method not in READ_METHODS:
+            response.set_cookie(STICKY_COOKIE, '1', max_age=sticky_seconds,
+                                httponly=True)
+        return response
@@ -0,0 +1,115 @@
+import re
+
+from sqlalchemy import false, func, literal_column, or_, table, column, text
+
+# Columns covered by the full-text document of a searchable model.
+# Must stay in sync with the indexes created by the search migration.
+SEARCH_COLUMNS = ('name', 'city')
+
+
+def _dialect(query):
+    return query.session.get_bind().dialect.name
+
+
+def _like_pattern(term):
+    escaped = re.sub(r'([\\%_])', r'\\\1', term)
+    return "%{}%".format(escaped)
+
+
+def search_document(model):
+    """tsvector over name and city, spelled exactly like the GIN index."""
+    document = getattr(model, SEARCH_COLUMNS[0])
+    for name in SEARCH_COLUMNS[1:]:
+        document = document.op('||')(literal_column("' '")) \
+            .op('||')(getattr(model, name))
+    return func.to_tsvector(literal_column("'simple'"), document)
+
+
+def _fts_table(model):
+    return table('{}_fts'.format(model.__tablename__), column('rowid'))
+
+
+def fts_query(term):
+    """Turn user input into an FTS5 query matching every word as a prefix."""
+    words = re.findall(r'\w+', term)
+    return ' '.join('"{}"*'.format(word) for word in words)
+
+
+def ranked(query, model, term):
+    """Filter `query` to rows of `model` matching `term`, best matches first.
+
+    Postgres uses the trigram index on name (which also serves ILIKE) and
+    the tsvector index on name and city, ranked by the better of the two
+    scores. SQLite goes through the FTS5 table kept in sync by triggers and
+    ranks with bm25. An empty term lists everything by name.
+    """
+    term = term.strip()
+    if not term:
+        return query.order_by(model.name, model.id)
+
+    dialect = _dialect(query)
+    if dialect == 'postgresql':
+        tsquery = func.plainto_tsquery(literal_column("'simple'"), term)
+        document = search_document(model)
+        rank = func.greatest(func.similarity(model.name, term),
+                             func.ts_rank(document, tsquery))
+        return query \
+            .filter(or_(model.name.ilike(_like_pattern(term), escape='\\'),
+                        document.op('@@')(tsquery))) \
+            .order_by(rank.desc(), model.id)
+
+    if dialect == 'sqlite':
+        match = fts_query(term)
+        if not match:
+            return query.filter(false())
+        fts = _fts_table(model)
+        return query \
+            .join(fts, fts.c.rowid == model.id) \
+            .filter(literal_column(fts.name).op('MATCH')(match)) \
+            .order_by(literal_column('{}.rank'.format(fts.name)), model.id)
+
+    return query \
+        .filter(model.name.ilike(_like_pattern(term), escape='\\')) \
+        .order_by(model.name, model.id)
+
+
+def matching_ids(session, model, term):
+    """Unordered id subquery of the rows of `model` matching `term`."""
+    return ranked(session.query(model.id), model, term) \
+        .order_by(None).subquery()
+
+
+def sqlite_fts_ddl(tablename):
+    """Statements creating and syncing the FTS5 index of `tablename`."""
+    fts = '{}_fts'.format(tablename)
+    columns = ', '.join(SEARCH_COLUMNS)
+    new_values = ', '.join('new.{}'.format(name) for name in SEARCH_COLUMNS)
+    old_values = ', '.join('old.{}'.format(name) for name in SEARCH_COLUMNS)
+    statements = (
+        "CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        "{columns}, content='{table}', content_rowid='id')",
+        "CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        "INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new}); END",
+        "CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        "INSERT INTO {fts}({fts}, rowid, {columns}) "
+        "VALUES ('delete', old.id, {old}); END",
+        # only edits of the indexed columns resync the row, the counters
+        # and updated_at change on every booking; dropped first so indexes
+        # created with an older trigger get this one on rebuild
+        "DROP TRIGGER IF EXISTS {fts}_au",
+        "CREATE TRIGGER {fts}_au AFTER UPDATE OF {columns} ON {table} BEGIN "
+        "INSERT INTO {fts}({fts}, rowid, {columns}) "
+        "VALUES ('delete', old.id, {old}); "
+        "INSERT INTO {fts}(rowid, {columns}) VALUES (new.id, {new}); END",
+        "INSERT INTO {fts}({fts}) VALUES ('rebuild')",
+    )
+    return [statement.format(fts=fts, table=tablename, columns=columns,
+                             new=new_values, old=old_values)
+            for statement in statements]
+
+
+def create_sqlite_index(connection, tablenames):
+    """Create (or rebuild) the FTS5 tables of a SQLite database."""
+    for tablename in tablenames:
+        for statement in sqlite_fts_ddl(tablename):
+            connection.execute(text(statement))
@@ -0,0 +1,328 @@
+import sys
+from datetime import timedelta
+
+from flask import Blueprint, abort, current_app, flash, redirect, \
+    render_template, request, url_for
+from sqlalchemy import case, func, literal, or_
+from sqlalchemy.exc import IntegrityError
+
+import availability
+import search
+from forms import ShowForm
+from models import db, Artist, Genre, Show, Unavailability, Venue, \
+    artist_genres
+from pages import VENUES_KEY, artist_key, cache, parse_date_arg, \
+    strict_loading, venue_key
+from replicas import read_only
+from utils import decode_cursor, encode_cursor, keyset_filter, \
+    start_of_today
+
+bp = Blueprint('shows', __name__)
+
+
+def split_shows(owner_column, owner_id, **filters):
+    """Past/upcoming counts and the first page of each list, straight from SQL.
+
+    `filters` are the /shows listing arguments used to build the
+    "load more" links that continue each list.
+    """
+    limit = current_app.config['DETAIL_SHOWS_LIMIT']
+    today = start_of_today()
+
+    past_count, upcoming_count = db.session.query(
+        func.count(case([(Show.start_time < today, Show.id)])),
+        func.count(case([(Show.start_time >= today, Show.id)]))) \
+        .filter(owner_column == owner_id) \
+        .one()
+
+    past_shows = Show.query \
+        .options(*strict_loading()) \
+        .filter(owner_column == owner_id, Show.start_time < today) \
+        .order_by(Show.start_time.desc(), Show.id.desc()) \
+        .limit(limit).all()
+    upcoming_shows = Show.query \
+        .options(*strict_loading()) \
+        .filter(owner_column == owner_id, Show.start_time >= today) \
+        .order_by(Show.start_time, Show.id) \
+        .limit(limit).all()
+
+    def more_url(shows, count, **args):
+        if len(shows) >= count:
+            return None
+        last = shows[-1]
+        return url_for('shows.shows',
+                       cursor=encode_cursor(last.start_time, last.id),
+                       **filters, **args)
+
+    return {
+        "past_shows": past_shows,
+        "upcoming_shows": upcoming_shows,
+        "past_shows_count": past_count,
+        "upcoming_shows_count": upcoming_count,
+        "past_shows_more_url": more_url(past_shows, past_count,
+                                        to=today.date().isoformat(),
+                                        order='desc'),
+        "upcoming_shows_more_url": more_url(upcoming_shows, upcoming_count,
+                                            **{'from': today.date().isoformat()}),
+    }
+
+
+def show_rows_query():
+    """Shows joined to the artist and venue columns the listings render."""
+    return db.session.query(Show.id,
+                            Show.start_time,
+                            Show.venue_id,
+                            Venue.name.label('venue_name'),
+                            Show.artist_id,
+                            Artist.name.label('artist_name'),
+                            Artist.image_link.label('artist_image_link')) \
+        .join(Venue, Venue.id == Show.venue_id) \
+        .join(Artist, Artist.id == Show.artist_id)
+
+
+def filter_show_dates(query):
+    date_from = parse_date_arg('from')
+    if date_from is not None:
+        query = query.filter(Show.start_time >= date_from)
+    date_to = parse_date_arg('to')
+    if date_to is not None:
+        query = query.filter(Show.start_time < date_to)
+    return query
+
+
+def paginate_show_rows(query, endpoint, filters, descending=False):
+    """One keyset page of show rows and the url of the next page."""
+    per_page = current_app.config['SHOWS_PER_PAGE']
+
+    cursor = request.args.get('cursor')
+    if cursor:
+        try:
+            query = query.filter(keyset_filter(Show.start_time, Show.id,
+                                               decode_cursor(cursor),
+                                               descending))
+        except ValueError:
+            abort(400)
+
+    if descending:
+        query = query.order_by(Show.start_time.desc(), Show.id.desc())
+    else:
+        query = query.order_by(Show.start_time, Show.id)
+
+    # fetch one extra row to know whether there is a next page
+    rows = query.limit(per_page + 1).all()
+    page, has_next = rows[:per_page], len(rows) > per_page
+
+    def mapper(row):
+        return {
+            "venue_id": row.venue_id,
+            "venue_name": row.venue_name,
+            "artist_id": row.artist_id,
+            "artist_name": row.artist_name,
+            "artist_image_link": row.artist_image_link,
+            "start_time": row.start_time
+        }
+
+    next_url = None
+    if has_next:
+        last = page[-1]
+        next_url = url_for(endpoint,
+                           cursor=encode_cursor(last.start_time, last.id),
+                           **filters)
+
+    return list(map(mapper, page)), next_url
+
+
+@bp.route('/shows')
+@read_only
+def shows():
+    filters = {key: request.args[key]
+               for key in ('from', 'to', 'venue_id', 'artist_id', 'order')
+               if request.args.get(key)}
+
+    query = filter_show_dates(show_rows_query())
+    venue_id = request.args.get('venue_id', type=int)
+    if venue_id is not None:
+        query = query.filter(Show.venue_id == venue_id)
+    artist_id = request.args.get('artist_id', type=int)
+    if artist_id is not None:
+        query = query.filter(Show.artist_id == artist_id)
+
+    data, next_url = paginate_show_rows(query, 'shows.shows', filters,
+                                        request.args.get('order') == 'desc')
+
+    return render_template('pages/shows.html', shows=data,
+                           filters=filters, next_url=next_url)
+
+
+@bp.route('/shows/create')
+def create_shows():
+    # renders form. do not touch.
+    form = ShowForm()
+    return render_template('forms/new_show.html', form=form)
+
+
+@bp.route('/shows/create', methods=['POST'])
+def create_show_submission():
+    form = ShowForm(request.form)
+    error = False
+
+    if(not form.validate()):
+        flash("Oops!, input data not valid. please check your input!")
+        return render_template('forms/new_show.html', form=form)
+
+    # check if artist exists
+    artist = Artist.query.get(request.form.get('artist_id'))
+    if artist is None:
+        form.venue_id.errors.append("Id is not associated with any artist")
+        return render_template('forms/new_show.html', form=form)
+
+    # check if venue exists
+    venue = Venue.query.get(request.form.get('venue_id'))
+    if venue is None:
+        form.venue_id.errors.append("Id is not associated with any venue")
+        return render_template('forms/new_show.html', form=form)
+
+    start_time = form.start_time.data
+    end_time = start_time + timedelta(minutes=form.duration.data)
+    if end_time - start_time > max_show_length():
+        form.duration.errors.append(
+            "A show can not last more than {} hours"
+            .format(current_app.config['MAX_SHOW_DURATION_HOURS']))
+        return render_template('forms/new_show.html', form=form)
+
+    if not artist_free_slots(artist.id, [(start_time, end_time)]):
+        form.start_time.errors.append("The artist is unavailable at that time")
+        return render_template('forms/new_show.html', form=form)
+
+    if venue_bookings(venue.id, start_time, end_time):
+        form.start_time.errors.append("The venue already has a show at that time")
+        return render_template('forms/new_show.html', form=form)
+
+    show = Show(artist_id=artist.id,
+                venue_id=venue.id,
+                start_time=start_time,
+                end_time=end_time)
+    try:
+        db.session.add(show)
+        db.session.commit()
+        cache.delete(VENUES_KEY, venue_key(show.venue_id),
+                     artist_key(show.artist_id))
+    except IntegrityError:
+        # the exclusion constraint caught a concurrent booking
+        db.session.rollback()
+        current_app.logger.exception("show booking conflict")
+        error = True
+        form.start_time.errors.append("The venue already has a show at that time")
+    except Exception:
+        db.session.rollback()
+        print(sys.exc_info())
+        error = True
+    finally:
+        db.session.close()
+
+    if error:
+        flash("An error occurred. Show could not be listed.")
+        return render_template('forms/new_show.html', form=form)
+
+    flash('Show was successfully listed!')
+    return redirect(url_for('shows.shows'))
+
+
+SHOW_SEARCH_FILTERS = ('search_term', 'from', 'to', 'city', 'state', 'genre')
+
+
+def show_facets(query):
+    """Show counts per venue state, venue city and artist genre.
+
+    All three groupings run as a single UNION ALL aggregate over the
+    filtered shows, so facets cost one round trip.
+    """
+    def facet(name, column, query=query):
+        return query.with_entities(literal(name).label('facet'),
+                                   column.label('value'),
+                                   func.count(Show.id).label('count')) \
+            .group_by(column)
+
+    genre_query = query \
+        .join(artist_genres, artist_genres.c.artist_id == Show.artist_id) \
+        .join(Genre, Genre.id == artist_genres.c.genre_id)
+
+    rows = facet('state', Venue.state) \
+        .union_all(facet('city', Venue.city),
+                   facet('genre', Genre.name, genre_query)) \
+        .all()
+
+    facets = {"state": [], "city": [], "genre": []}
+    for name, value, count in rows:
+        facets[name].append((value, count))
+
+    return {name: sorted(counts) for name, counts in facets.items()}
+
+
+@bp.route('/shows/search', methods=['GET'])
+@read_only
+def search_shows():
+    search_term = request.args.get('search_term', '')
+    filters = {key: request.args[key]
+               for key in SHOW_SEARCH_FILTERS if request.args.get(key)}
+
+    query = filter_show_dates(show_rows_query())
+    if search_term.strip():
+        query = query.filter(or_(
+            Show.artist_id.in_(search.matching_ids(db.session, Artist, search_term)),
+            Show.venue_id.in_(search.matching_ids(db.session, Venue, search_term))))
+    if filters.get('city'):
+        query = query.filter(Venue.city == filters['city'])
+    if filters.get('state'):
+        query = query.filter(Venue.state == filters['state'])
+    if filters.get('genre'):
+        query = query.filter(Show.artist_id.in_(
+            db.session.query(artist_genres.c.artist_id)
+            .join(Genre, Genre.id == artist_genres.c.genre_id)
+            .filter(Genre.name == filters['genre'])))
+
+    facets = show_facets(query)
+    data, next_url = paginate_show_rows(query, 'shows.search_shows', filters)
+
+    def facet_url(name, value):
+        return url_for('shows.search_shows', **dict(filters, **{name: value}))
+
+    results = {
+        "count": sum(count for _, count in facets['state']),
+        "data": data,
+        "facets": facets,
+    }
+
+    return render_template('pages/show.html', results=results,
+                           search_term=search_term, filters=filters,
+                           facet_url=facet_url, next_url=next_url)
+
+
+#  Scheduling
+#  ----------------------------------------------------------------
+
+def artist_free_slots(artist_id, slots):
+    """The (start, end) slots the artist has not blocked, one query."""
+    return availability.free_slots(db.session, Unavailability,
+                                   Unavailability.artist_id, artist_id, slots)
+
+
+def artist_is_free(artist_id, at):
+    return availability.is_free(db.session, Unavailability,
+                                Unavailability.artist_id, artist_id, at)
+
+
+def max_show_length():
+    return timedelta(hours=current_app.config['MAX_SHOW_DURATION_HOURS'])
+
+
+def venue_bookings(venue_id, start, end):
+    """(start_time, end_time) of the venue's shows overlapping [start, end).
+
+    One probe of the (venue_id, period) GiST index on Postgres, of the
+    (venue_id, start_time) index bounded by MAX_SHOW_DURATION_HOURS
+    elsewhere, so booking stays O(log n) as the schedule fills up.
+    """
+    return availability.busy_windows(db.session, Show, Show.venue_id,
+                                     venue_id, start, end,
+                                     max_length=max_show_length())
@@ -0,0 +1,12 @@
+import instrumentation
+from app import create_app
+
+
+def test_create_app_attaches_each_log_handler_once():
+    def handler_counts(app):
+        loggers = (app.logger, instrumentation.request_log,
+                   instrumentation.slow_query_log)
+        return [len(logger.handlers) for logger in loggers]
+
+    counts = handler_counts(create_app())
+    assert handler_counts(create_app()) == counts
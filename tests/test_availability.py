@@ -0,0 +1,114 @@
+import random
+from datetime import datetime, timedelta
+
+import availability
+from availability import IntervalTree, sweep_conflicts
+from models import db, Artist, Unavailability
+
+DAY = datetime(2030, 5, 1)
+
+
+def at(hour):
+    return DAY + timedelta(hours=hour)
+
+
+def slot(start_hour, end_hour):
+    return at(start_hour), at(end_hour)
+
+
+def test_empty_tree_is_free_everywhere():
+    tree = IntervalTree([])
+    assert len(tree) == 0
+    assert tree.overlapping(*slot(10, 12)) == []
+    assert tree.is_free(*slot(10, 12))
+    assert tree.is_free(*slot(10, 10))
+
+
+def test_overlapping_slots_are_busy():
+    tree = IntervalTree([slot(10, 12)])
+    for start, end in ((9, 11), (11, 13), (10, 12), (9, 13), (10.5, 11.5)):
+        assert not tree.is_free(*slot(start, end)), (start, end)
+
+
+def test_adjacent_slots_are_free():
+    tree = IntervalTree([slot(10, 12)])
+    assert tree.is_free(*slot(8, 10))
+    assert tree.is_free(*slot(12, 14))
+
+
+def test_instants_are_busy_from_the_start_until_the_end():
+    tree = IntervalTree([slot(10, 12)])
+    assert not tree.is_free(*slot(10, 10))
+    assert not tree.is_free(*slot(11, 11))
+    assert tree.is_free(*slot(12, 12))
+
+
+def test_overlapping_lists_every_window_by_start():
+    windows = [slot(14, 15), slot(8, 20), slot(10, 12), slot(16, 17)]
+    assert IntervalTree(windows).overlapping(*slot(11, 14.5)) == \
+        [slot(8, 20), slot(10, 12), slot(14, 15)]
+
+
+def test_overlapping_matches_a_linear_scan():
+    rng = random.Random(7)
+    windows = []
+    for _ in range(200):
+        start = rng.randrange(0, 500)
+        windows.append((start, start + rng.randrange(1, 30)))
+    tree = IntervalTree(windows)
+    for _ in range(500):
+        start = rng.randrange(-10, 520)
+        end = start + rng.randrange(0, 20)
+        expected = sorted(
+            window for window in windows
+            if (window[0] <= end if start == end else window[0] < end) and
+            window[1] > start)
+        assert tree.overlapping(start, end) == expected
+
+
+def conflicts(windows):
+    return sorted((first[3], second[3])
+                  for first, second in sweep_conflicts(sorted(windows)))
+
+
+def test_sweep_conflicts_of_nothing():
+    assert conflicts([]) == []
+
+
+def test_sweep_conflicts_pairs_overlapping_windows():
+    assert conflicts([(1, at(10), at(12), 'a'), (1, at(11), at(13), 'b'),
+                      (1, at(14), at(15), 'c')]) == [('a', 'b')]
+
+
+def test_sweep_conflicts_allows_back_to_back_windows():
+    assert conflicts([(1, at(10), at(12), 'a'), (1, at(12), at(14), 'b')]) \
+        == []
+
+
+def test_sweep_conflicts_is_per_owner():
+    assert conflicts([(1, at(10), at(12), 'a'), (2, at(11), at(13), 'b')]) \
+        == []
+
+
+def test_sweep_conflicts_reports_each_window_open_at_a_start():
+    assert conflicts([(1, at(8), at(20), 'long'), (1, at(10), at(12), 'a'),
+                      (1, at(11), at(13), 'b')]) == \
+        [('a', 'b'), ('long', 'a'), ('long', 'b')]
+
+
+def free_slots(artist, slots):
+    return availability.free_slots(db.session, Unavailability,
+                                   Unavailability.artist_id, artist.id, slots)
+
+
+def test_free_slots(app):
+    artist = Artist(name='Kara', city='San Francisco', state='CA')
+    db.session.add(artist)
+    db.session.commit()
+    db.session.add(Unavailability(artist_id=artist.id, start_time=at(10),
+                                  end_time=at(12)))
+    db.session.commit()
+
+    assert free_slots(artist, []) == []
+    slots = [slot(8, 10), slot(9, 11), slot(11, 11), slot(12, 14)]
+    assert free_slots(artist, slots) == [slot(8, 10), slot(12, 14)]
@@ -0,0 +1,92 @@
+import io
+from datetime import datetime, timedelta
+
+from imports import import_file
+from models import db, Artist, Show, Unavailability, Venue
+
+START = datetime(2030, 5, 1, 20)
+ARTIST_COLUMNS = 'name,city,state,phone,genres,facebook_link,website,' \
+    'image_link,seeking_venue\n'
+
+
+def artist_line(name, link, seeking_venue='', genres='Jazz'):
+    return '{},San Francisco,CA,326-123-5000,"{}",{},https://x.com,' \
+        'https://x.com/a.png,{}\n'.format(name, genres, link, seeking_venue)
+
+
+def import_csv(kind, text, batch_size=None):
+    return import_file(kind, io.StringIO(text), 'csv', batch_size)
+
+
+def test_artists_reusing_a_facebook_link_are_rejected(app):
+    db.session.add(Artist(name='Listed', city='San Francisco', state='CA',
+                          facebook_link='https://fb.com/listed'))
+    db.session.commit()
+
+    report = import_csv('artists', ARTIST_COLUMNS +
+                        artist_line('Kara', 'https://fb.com/kara') +
+                        artist_line('Kara again', 'https://fb.com/kara') +
+                        artist_line('Copy', 'https://fb.com/listed') +
+                        artist_line('Mo', 'https://fb.com/mo'))
+
+    assert report.created == 2
+    assert report.errors == [
+        (3, "facebook_link: https://fb.com/kara is already listed"),
+        (4, "facebook_link: https://fb.com/listed is already listed"),
+    ]
+    assert sorted(name for name, in db.session.query(Artist.name)) == \
+        ['Kara', 'Listed', 'Mo']
+
+
+def test_artist_checkbox_and_list_columns(app):
+    report = import_csv('artists', ARTIST_COLUMNS +
+                        artist_line('Kara', 'https://fb.com/kara', 'yes',
+                                    'Jazz, Soul') +
+                        artist_line('Mo', 'https://fb.com/mo', 'false'))
+    assert report.errors == []
+    kara, mo = Artist.query.order_by(Artist.name).all()
+    assert kara.seeking_venue and not mo.seeking_venue
+    assert sorted(genre.name for genre in kara.genres) == ['Jazz', 'Soul']
+
+
+def show_line(artist, venue, start_time, duration=120):
+    return '{},{},{:%Y-%m-%d %H:%M:%S},{}\n'.format(artist.id, venue.id,
+                                                    start_time, duration)
+
+
+def test_conflicting_shows_are_rejected(app):
+    venue = Venue(name='The Musical Hop', city='San Francisco', state='CA')
+    artist = Artist(name='Kara', city='San Francisco', state='CA')
+    other = Artist(name='Mo', city='San Francisco', state='CA')
+    db.session.add_all([venue, artist, other])
+    db.session.flush()
+    db.session.add(Show(artist_id=other.id, venue_id=venue.id,
+                        start_time=START, end_time=START + timedelta(hours=2)))
+    db.session.add(Unavailability(artist_id=artist.id,
+                                  start_time=START + timedelta(days=2),
+                                  end_time=START + timedelta(days=3)))
+    db.session.commit()
+
+    day = timedelta(days=1)
+    report = import_csv('shows', 'artist_id,venue_id,start_time,duration\n' +
+                        # back to back with the listed show
+                        show_line(artist, venue, START + timedelta(hours=2)) +
+                        # overlaps the listed show
+                        show_line(artist, venue, START - timedelta(hours=1)) +
+                        show_line(artist, venue, START + day) +
+                        # overlaps the row above, in the same file
+                        show_line(other, venue,
+                                  START + day + timedelta(hours=1)) +
+                        # the artist is unavailable
+                        show_line(artist, venue, START + 2 * day) +
+                        show_line(artist, venue, START + 4 * day, 25 * 60),
+                        batch_size=3)
+
+    assert report.created == 2
+    assert sorted(report.errors) == [
+        (3, "start_time: the venue already has a show at that time"),
+        (5, "start_time: the venue already has a show at that time"),
+        (6, "start_time: the artist is unavailable at that time"),
+        (7, "duration: a show can not last more than 24 hours"),
+    ]
+    assert Show.query.count() == 3
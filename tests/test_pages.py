@@ -0,0 +1,31 @@
+from prometheus_client import REGISTRY
+
+from pages import cached_version
+
+
+def cache_counts(kind):
+    return tuple(REGISTRY.get_sample_value(name, {'kind': kind}) or 0
+                 for name in ('fyyur_cache_hits_total',
+                              'fyyur_cache_misses_total'))
+
+
+def test_cached_version_reuses_the_entry_of_its_version(app):
+    builds = []
+
+    def build():
+        builds.append(len(builds))
+        return 'page {}'.format(len(builds))
+
+    hits, misses = cache_counts('page')
+    assert cached_version('page:1', '"v1"', build) == 'page 1'
+    assert cached_version('page:1', '"v1"', build) == 'page 1'
+    assert len(builds) == 1
+    assert cache_counts('page') == (hits + 1, misses + 1)
+
+
+def test_outdated_versions_are_rebuilt_and_count_as_misses(app):
+    hits, misses = cache_counts('page')
+    cached_version('page:1', '"v1"', lambda: 'old')
+    assert cached_version('page:1', '"v2"', lambda: 'new') == 'new'
+    assert cached_version('page:1', '"v2"', lambda: 'newer') == 'new'
+    assert cache_counts('page') == (hits + 1, misses + 2)
@@ -0,0 +1,45 @@
+from datetime import datetime, timedelta
+
+from models import db, Artist, Unavailability
+from shows import artist_is_free
+
+EVENING = datetime(2030, 5, 1, 18)
+
+
+def add_artist(name='Kara'):
+    artist = Artist(name=name, city='San Francisco', state='CA')
+    db.session.add(artist)
+    db.session.commit()
+    return artist
+
+
+def block(artist, start, end):
+    db.session.add(Unavailability(artist_id=artist.id, start_time=start,
+                                  end_time=end))
+    db.session.commit()
+
+
+def test_artist_without_unavailabilities_is_free(app):
+    artist = add_artist()
+    assert artist_is_free(artist.id, EVENING)
+
+
+def test_artist_is_busy_inside_a_window(app):
+    artist = add_artist()
+    block(artist, EVENING, EVENING + timedelta(hours=2))
+    assert not artist_is_free(artist.id, EVENING)
+    assert not artist_is_free(artist.id, EVENING + timedelta(hours=1))
+
+
+def test_windows_are_half_open(app):
+    artist = add_artist()
+    block(artist, EVENING, EVENING + timedelta(hours=2))
+    assert artist_is_free(artist.id, EVENING - timedelta(seconds=1))
+    # unavailable until 20:00 means free to play at 20:00
+    assert artist_is_free(artist.id, EVENING + timedelta(hours=2))
+
+
+def test_other_artists_windows_do_not_count(app):
+    artist, other = add_artist(), add_artist('Mo')
+    block(other, EVENING, EVENING + timedelta(hours=2))
+    assert artist_is_free(artist.id, EVENING + timedelta(hours=1))
@@ -0,0 +1,23 @@
+from models import db, Artist
+import search
+
+
+def search_artists(term):
+    return [artist.name for artist in
+            search.ranked(Artist.query, Artist, term)]
+
+
+def test_renamed_rows_are_searchable(app):
+    artist = Artist(name='Guns N Petals', city='San Francisco', state='CA')
+    db.session.add(artist)
+    db.session.commit()
+    artist.name = 'Matt Quevedo'
+    db.session.commit()
+    assert search_artists('quevedo') == ['Matt Quevedo']
+    assert search_artists('petals') == []
+
+
+def test_only_indexed_columns_resync_the_index(app):
+    sql, = db.session.execute(
+        "SELECT sql FROM sqlite_master WHERE name = 'artists_fts_au'").first()
+    assert 'AFTER UPDATE OF name, city ON artists' in sql
@@ -0,0 +1,67 @@
+import base64
+import html
+import re
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, Artist, Show, Venue
+from utils import decode_cursor, encode_cursor
+
+START = datetime(2030, 5, 1, 20)
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(START, 42)) == (START, 42)
+
+
+@pytest.mark.parametrize('cursor', [
+    'not a cursor',
+    base64.urlsafe_b64encode(b'2030-05-01T20:00:00').decode(),
+    base64.urlsafe_b64encode(b'2030-05-01T20:00:00|x').decode(),
+    base64.urlsafe_b64encode(b'yesterday|1').decode(),
+    base64.urlsafe_b64encode(b'\xff\xfe').decode(),
+])
+def test_malformed_cursors_raise_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_invalid_cursor_is_a_bad_request(client):
+    assert client.get('/shows?cursor=not-a-cursor').status_code == 400
+
+
+def add_shows(start_times):
+    venue = Venue(name='The Musical Hop', city='San Francisco', state='CA')
+    db.session.add(venue)
+    for i, start_time in enumerate(start_times):
+        artist = Artist(name='Artist {}'.format(i), city='San Francisco',
+                        state='CA')
+        db.session.add(artist)
+        db.session.flush()
+        db.session.add(Show(artist_id=artist.id, venue_id=venue.id,
+                            start_time=start_time,
+                            end_time=start_time + timedelta(hours=2)))
+    db.session.commit()
+
+
+def walk_pages(client, url):
+    """Artist names of every page, following the next page links."""
+    pages = []
+    while url:
+        body = client.get(url).data.decode()
+        pages.append(re.findall(r'>(Artist \d+)</a>', body))
+        next_url = re.search(r'<li class="next"><a href="([^"]+)"', body)
+        url = html.unescape(next_url.group(1)) if next_url else None
+    return pages
+
+
+def test_keyset_pages_cover_every_show_once(app, client):
+    app.config['SHOWS_PER_PAGE'] = 2
+    # three shows share a start time, the id breaks the tie
+    add_shows([START, START, START + timedelta(days=1), START,
+               START + timedelta(days=2)])
+    assert walk_pages(client, '/shows') == [
+        ['Artist 0', 'Artist 1'], ['Artist 3', 'Artist 2'], ['Artist 4']]
+    assert walk_pages(client, '/shows?order=desc') == [
+        ['Artist 4', 'Artist 2'], ['Artist 3', 'Artist 1'], ['Artist 0']]
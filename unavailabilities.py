@@ -0,0 +1,152 @@
+import sys
+from datetime import timedelta
+
+from flask import Blueprint, current_app, flash, redirect, render_template, \
+    request, url_for
+
+import availability
+from forms import UnavailabilityForm
+from models import db, Artist, Genre, Show, Unavailability, artist_genres, \
+    touch
+from pages import artist_key, cache, parse_date_arg
+from replicas import read_only
+from shows import max_show_length
+
+bp = Blueprint('unavailabilities', __name__)
+
+
+def available_artists(start, end, city=None, state=None, genre=None,
+                      after=0, limit=50):
+    """Artists seeking a venue with neither an unavailability window nor a
+    show overlapping [start, end), keyset paginated by id.
+
+    Both checks are NOT EXISTS anti-joins probing the per-artist interval
+    indexes, so a page costs about the same whatever the catalogue size.
+    """
+    dialect = db.session.get_bind().dialect.name
+
+    blocked = db.session.query(Unavailability.id) \
+        .filter(Unavailability.artist_id == Artist.id,
+                availability.overlap(dialect, Unavailability, start, end))
+    booked = db.session.query(Show.id) \
+        .filter(Show.artist_id == Artist.id,
+                availability.overlap(dialect, Show, start, end,
+                                     max_length=max_show_length()))
+
+    query = db.session.query(Artist.id, Artist.name, Artist.city,
+                             Artist.state, Artist.image_link) \
+        .filter(Artist.seeking_venue.is_(True),
+                Artist.id > after,
+                ~blocked.exists(),
+                ~booked.exists())
+    if city:
+        query = query.filter(Artist.city == city)
+    if state:
+        query = query.filter(Artist.state == state)
+    if genre:
+        query = query \
+            .join(artist_genres, artist_genres.c.artist_id == Artist.id) \
+            .join(Genre, Genre.id == artist_genres.c.genre_id) \
+            .filter(Genre.name == genre)
+
+    rows = query.order_by(Artist.id).limit(limit + 1).all()
+    page = rows[:limit]
+    next_after = page[-1].id if len(rows) > limit else None
+    return page, next_after
+
+
+@bp.route('/artists/available')
+@read_only
+def artists_available():
+    filters = {name: request.args.get(name, '').strip()
+               for name in ('at', 'city', 'state', 'genre')}
+    start = parse_date_arg('at')
+    data, next_url = [], None
+    if start is not None:
+        end = start + timedelta(hours=current_app.config['SHOW_DURATION_HOURS'])
+        rows, next_after = available_artists(
+            start, end,
+            city=filters['city'], state=filters['state'],
+            genre=filters['genre'],
+            after=request.args.get('after', 0, type=int),
+            limit=current_app.config['AVAILABLE_ARTISTS_PER_PAGE'])
+        data = [row._asdict() for row in rows]
+        if next_after:
+            next_url = url_for('unavailabilities.artists_available',
+                               after=next_after,
+                               **{name: value for name, value
+                                  in filters.items() if value})
+
+    return render_template('pages/available_artists.html', artists=data,
+                           filters=filters, searched=start is not None,
+                           next_url=next_url)
+
+
+@bp.route('/artists/<int:artist_id>/unavailabilities/create')
+def create_unavailabilities(artist_id):
+    Artist.query.get_or_404(artist_id)
+
+    form = UnavailabilityForm()
+    form.artist_id.data = artist_id
+
+    return render_template('forms/new_unavailability.html', form=form)
+
+
+@bp.route('/artists/<int:artist_id>/unavailabilities/create', methods=['POST'])
+def create_unavailability_submission(artist_id):
+    form = UnavailabilityForm(request.form)
+    error = False
+    if(not form.validate()):
+        flash("Oops!, input data not valid. please check your input!")
+        return render_template('forms/new_unavailability.html', form=form)
+
+    # check if artist exists
+    artist = Artist.query.get_or_404(request.form.get('artist_id'))
+
+    unavailability = Unavailability(artist_id=artist.id,
+                                    start_time=form.start_time.data,
+                                    end_time=form.end_time.data)
+
+    try:
+        db.session.add(unavailability)
+        touch(Artist, [unavailability.artist_id])
+        db.session.commit()
+        cache.delete(artist_key(unavailability.artist_id))
+    except Exception:
+        db.session.rollback()
+        print(sys.exc_info())
+        error = True
+    finally:
+        db.session.close()
+
+    if error:
+        flash("An error occurred. unavailability could not be listed.")
+        return render_template('forms/new_unavailability.html', form=form)
+
+    flash('unavailability was successfully added!')
+    return redirect(url_for('artists.show_artist', artist_id=artist_id))
+
+
+@bp.route('/unavailabilities/<unavailability_id>', methods=['DELETE'])
+def delete_unavailability(unavailability_id):
+    unavailability = Unavailability.query.get(unavailability_id)
+
+    if unavailability is None:
+        flash('unavailability not found')
+        return redirect(url_for('main.index'))
+
+    artist_id = unavailability.artist_id
+    try:
+        db.session.delete(unavailability)
+        touch(Artist, [artist_id])
+        db.session.commit()
+        cache.delete(artist_key(artist_id))
+        flash('unavailability was successfully deleted!')
+    except Exception:
+        db.session.rollback()
+        print(sys.exc_info())
+        flash("Oops!, Something went wrong!")
+    finally:
+        db.session.close()
+
+    return redirect(url_for('artists.show_artist', artist_id=artist_id))
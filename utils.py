@@ -1,10 +1,39 @@
-from datetime import datetime
+import base64
+from datetime import datetime, time
 
+from sqlalchemy import and_, or_
 
-def is_past_show(show):
-    return is_past_datetime(show.start_time)
 
+def start_of_today():
+    """Shows starting before this moment are considered past shows."""
+    return datetime.combine(datetime.now().date(), time.min)
 
-def is_past_datetime(my_datetime):
-    print(my_datetime.date() < datetime.now().date())
-    return my_datetime.date() < datetime.now().date()
+
+def encode_cursor(start_time, id):
+    """Opaque "next page" token for a (start_time, id) keyset position."""
+    raw = "{}|{}".format(start_time.isoformat(), id)
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Reverse of encode_cursor, raises ValueError on a malformed token."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        start_time, id = raw.split('|')
+        return datetime.fromisoformat(start_time), int(id)
+    except (TypeError, UnicodeError, ValueError) as error:
+        raise ValueError("Invalid cursor") from error
+
+
+def keyset_filter(start_time_column, id_column, cursor, descending=False):
+    """Rows strictly after the cursor position in (start_time, id) order.
+
+    Spelled out instead of a row-value comparison so every backend can
+    drive it from a (start_time, id) index.
+    """
+    start_time, id = cursor
+    if descending:
+        return or_(start_time_column < start_time,
+                   and_(start_time_column == start_time, id_column < id))
+    return or_(start_time_column > start_time,
+               and_(start_time_column == start_time, id_column > id))
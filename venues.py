@@ -0,0 +1,292 @@
+import sys
+from itertools import groupby
+
+from flask import Blueprint, flash, redirect, render_template, request, \
+    url_for
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import selectinload
+
+from forms import VenueForm
+from models import db, Artist, Show, Venue, genres_from_names, touch, \
+    venue_genres
+from pages import VENUES_KEY, browse_by_genre, cached_version, \
+    conditional, invalidate_venue, listing_version, load_related, \
+    page_version, render_listing, search_entities, strict_loading, \
+    venue_key
+from replicas import read_only
+from shows import split_shows
+
+bp = Blueprint('venues', __name__)
+
+
+def group_by_city_state(rows):
+    """Areas of venue rows ordered by state and city, one at a time."""
+    for (state, city), venues in groupby(rows, lambda x: (x.state, x.city)):
+        yield {
+            "state": state,
+            "city": city,
+            "venues": [{
+                "id": venue.id,
+                "name": venue.name,
+                "num_upcoming_shows": venue.upcoming_show_count
+            } for venue in venues]
+        }
+
+
+@bp.route('/venues')
+@read_only
+def venues():
+    query = db.session.query(Venue.id, Venue.name, Venue.city,
+                             Venue.state, Venue.upcoming_show_count) \
+        .order_by(Venue.state, Venue.city, Venue.id)
+    etag, last_modified = listing_version(Venue)
+    return conditional(etag, last_modified, lambda: render_listing(
+        'pages/venues.html', 'areas', VENUES_KEY, etag, query,
+        group_by_city_state))
+
+
+# Make it accept Get request for better UX
+@bp.route('/venues/search', methods=['GET'])
+@read_only
+def search_venues():
+    response, search_term = search_entities(Venue, 'venues.search_venues')
+    return render_template('pages/search_venues.html', results=response, search_term=search_term)
+
+
+@bp.route('/venues/<int:venue_id>')
+@read_only
+def show_venue(venue_id):
+    def render():
+        data = cached_version(venue_key(venue_id), etag,
+                              lambda: venue_page(venue_id))
+        return render_template('pages/show_venue.html', venue=data)
+
+    etag, last_modified = page_version(Venue, venue_id)
+    return conditional(etag, last_modified, render)
+
+
+def venue_page(venue_id):
+    venue = Venue.query \
+        .options(selectinload(Venue.genres), *strict_loading()) \
+        .get_or_404(venue_id)
+
+    shows = split_shows(Show.venue_id, venue_id, venue_id=venue_id)
+    artists = load_related(Artist,
+                           (show.artist_id for show in
+                            shows['past_shows'] + shows['upcoming_shows']),
+                           Artist.name, Artist.image_link)
+
+    def mapper(show):
+        artist = artists[show.artist_id]
+        return {
+            "artist_id": artist.id,
+            "artist_name": artist.name,
+            "artist_image_link": artist.image_link,
+            "start_time": show.start_time
+        }
+    past_shows_dict = list(map(mapper, shows['past_shows']))
+    upcoming_shows_dict = list(map(mapper, shows['upcoming_shows']))
+
+    data = {
+        "id": venue.id,
+        "name": venue.name,
+        "genres": [genre.name for genre in venue.genres],
+        "address": venue.address,
+        "city": venue.city,
+        "state": venue.state,
+        "phone": venue.phone,
+        "website": venue.website,
+        "facebook_link": venue.facebook_link,
+        "seeking_talent": venue.seeking_talent,
+        "seeking_description": venue.seeking_description,
+        "image_link": venue.image_link,
+        "past_shows": past_shows_dict,
+        "upcoming_shows": upcoming_shows_dict,
+        "past_shows_count": shows['past_shows_count'],
+        "upcoming_shows_count": shows['upcoming_shows_count'],
+        "past_shows_more_url": shows['past_shows_more_url'],
+        "upcoming_shows_more_url": shows['upcoming_shows_more_url'],
+    }
+
+    return data
+
+#  Create Venue
+#  ----------------------------------------------------------------
+
+
+@bp.route('/venues/create', methods=['GET'])
+def create_venue_form():
+    form = VenueForm()
+    return render_template('forms/new_venue.html', form=form)
+
+
+@bp.route('/venues/create', methods=['POST'])
+def create_venue_submission():
+    form = VenueForm(request.form)
+    error = False
+    if not form.validate():
+        if form.csrf_token.errors:
+            flash("Your session is expired. please try again")
+
+        flash("Oops!, input data not valid. please check your input!")
+        return render_template('forms/new_venue.html', form=form)
+
+    venue = create_venue_from_request(request)
+    venue_id = None
+    try:
+        db.session.add(venue)
+        db.session.commit()
+        venue_id = venue.id
+        invalidate_venue(venue_id)
+    except IntegrityError:
+        db.session.rollback()
+        print(sys.exc_info())
+        error = True
+        flash("Oops!, looks like another venue uses this facebook link!")
+    except Exception:
+        db.session.rollback()
+        print(sys.exc_info())
+        error = True
+        flash("Oops!, Something went wrong!")
+    finally:
+        db.session.close()
+    if error:
+        return render_template('forms/new_venue.html', form=form)
+    else:
+        flash('Venue ' + request.form['name'] +
+              ' was successfully listed!')
+        return redirect(url_for('venues.show_venue', venue_id=venue_id))
+
+
+def create_venue_from_request(request):
+    return populate_venue_from_request(Venue(), request)
+
+
+def populate_venue_from_request(venue, request):
+    form = request.form
+    seeking_talent_str = form.get('seeking_talent', '')
+    seeking_talent = len(seeking_talent_str) > 0
+
+    venue.name = form['name']
+    venue.city = form['city']
+    venue.state = form['state']
+    venue.address = form['address']
+    venue.phone = form['phone']
+    venue.genres = genres_from_names(form.getlist('genres'))
+    venue.facebook_link = form['facebook_link']
+    venue.image_link = form['image_link']
+    venue.website = form['website']
+    venue.seeking_talent = seeking_talent
+    venue.seeking_description = form['seeking_description']
+    # genres live in another table, bump the version explicitly
+    venue.updated_at = func.now()
+
+    return venue
+
+
+@bp.route('/venues/<venue_id>', methods=['DELETE'])
+def delete_venue(venue_id):
+    venue = Venue.query.get(venue_id)
+
+    if venue is None:
+        flash('Venue not found')
+        return redirect(url_for('main.index'))
+
+    venue_name = venue.name
+
+    try:
+        invalidate_venue(venue.id)
+        db.session.delete(venue)
+        db.session.commit()
+        flash('Venue ' + venue_name +
+              ' was successfully deleted!')
+    except Exception:
+        db.session.rollback()
+        print(sys.exc_info())
+        flash("Oops!, Something went wrong!")
+    finally:
+        db.session.close()
+
+    return redirect(url_for('main.index'))
+
+#  Update
+#  ----------------------------------------------------------------
+
+
+@bp.route('/venues/<int:venue_id>/edit', methods=['GET'])
+def edit_venue(venue_id):
+    venue_obj = Venue.query.get_or_404(venue_id)
+
+    venue = {
+        "id": venue_obj.id,
+        "name": venue_obj.name,
+    }
+
+    # populate form with VenueForm
+    form = VenueForm(obj=venue_obj)
+    form.genres.data = [genre.name for genre in venue_obj.genres]
+
+    return render_template('forms/edit_venue.html', form=form, venue=venue)
+
+
+@bp.route('/venues/<int:venue_id>/edit', methods=['POST'])
+def edit_venue_submission(venue_id):
+    old_venue = Venue.query.get_or_404(venue_id)
+    form = VenueForm(request.form)
+    venue_dict = {
+        "id": venue_id,
+        'name': request.form.get('name', '')
+    }
+    error = False
+    if not form.validate():
+        if form.csrf_token.errors:
+            flash("Your session is expired. please try again")
+
+        flash("Oops!, input data not valid. please check your input!")
+        return render_template('forms/edit_venue.html', form=form, venue=venue_dict)
+
+    venue = populate_venue_from_request(old_venue, request)
+    venue_id = None
+    try:
+        # artist pages show the venue's name and image
+        touch(Artist, db.session.query(Show.artist_id)
+              .filter(Show.venue_id == venue.id))
+        db.session.commit()
+        venue_id = venue.id
+        invalidate_venue(venue_id)
+    except IntegrityError:
+        db.session.rollback()
+        print(sys.exc_info())
+        error = True
+        flash("Oops!, looks like another venue uses this facebook link!")
+    except Exception:
+        db.session.rollback()
+        print(sys.exc_info())
+        error = True
+        flash("Oops!, Something went wrong!")
+    finally:
+        db.session.close()
+    if error:
+        return render_template('forms/edit_venue.html', form=form, venue=venue_dict)
+    else:
+        flash('Venue ' + request.form['name'] +
+              ' was successfully updated!')
+        return redirect(url_for('venues.show_venue', venue_id=venue_id))
+
+#  Genres
+#  ----------------------------------------------------------------
+
+
+@bp.route('/venues/genres/<genre_name>')
+@read_only
+def venues_by_genre(genre_name):
+    rows, next_after = browse_by_genre(Venue, venue_genres,
+                                       venue_genres.c.venue_id, genre_name,
+                                       Venue.city, Venue.state)
+    data = list(map(lambda x: {"id": x.id, "name": x.name,
+                               "city": x.city, "state": x.state}, rows))
+    next_url = url_for('venues.venues_by_genre', genre_name=genre_name,
+                       after=next_after) if next_after else None
+    return render_template('pages/venues_by_genre.html', venues=data,
+                           genre=genre_name, next_url=next_url)
@@ -0,0 +1,67 @@
+import time
+
+from flask import url_for
+from sqlalchemy.pool import QueuePool
+
+from models import db
+
+
+def engines(app):
+    """The engine of the primary and of every read replica."""
+    binds = [None] + sorted(app.config['SQLALCHEMY_BINDS'] or ())
+    return [db.get_engine(app, bind) for bind in binds]
+
+
+def compile_templates(app):
+    """Load every template, so no request pays for parsing one, and return
+    their names. With a TEMPLATE_CACHE_DIR only the first process to load a
+    template compiles it, the others read its bytecode."""
+    names = app.jinja_env.list_templates(extensions=['html'])
+    for name in names:
+        app.jinja_env.get_template(name)
+    return names
+
+
+def prime_caches(app):
+    """Request the WARMUP_ENDPOINTS once, which fills the page cache
+    through the views themselves."""
+    with app.test_request_context():
+        urls = [url_for(endpoint) for endpoint in app.config['WARMUP_ENDPOINTS']]
+    client = app.test_client()
+    for url in urls:
+        response = client.get(url, buffered=True)
+        if response.status_code != 200:
+            app.logger.warning("warmup: %s answered %s", url,
+                               response.status_code)
+
+
+def dispose_connections(app):
+    """Close the pooled connections, a forked process must not reuse the
+    sockets of its parent."""
+    for engine in engines(app):
+        engine.dispose()
+
+
+def open_connections(app, count):
+    """Fill each connection pool with up to `count` connections, so the
+    first requests of a worker do not wait on connection setup."""
+    for engine in engines(app):
+        if not isinstance(engine.pool, QueuePool):
+            continue
+        connections = [engine.connect()
+                       for _ in range(min(count, engine.pool.size()))]
+        for connection in connections:
+            connection.close()
+
+
+def warm(app):
+    """Do the cold start work of a server once, before it forks: compile
+    the templates and prime the page cache, then let go of the
+    connections that took. Workers open their own with open_connections().
+    """
+    started = time.perf_counter()
+    compile_templates(app)
+    prime_caches(app)
+    dispose_connections(app)
+    app.logger.info("warmup took %.0f ms",
+                    (time.perf_counter() - started) * 1000)
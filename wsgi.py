@@ -0,0 +1,12 @@
+"""Production entry point, served with the settings of gunicorn.conf.py:
+
+    gunicorn wsgi:app
+
+The app is built and warmed up once in the gunicorn master, the workers
+fork from it with compiled templates and a primed page cache.
+"""
+import warmup
+from app import create_app
+
+app = create_app()
+warmup.warm(app)